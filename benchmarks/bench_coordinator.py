@@ -0,0 +1,49 @@
+"""Control loop and persistence hot paths of a single warmer."""
+from homeassistant.setup import async_setup_component
+
+from custom_components.towel_warmer_plug.const import DOMAIN
+
+from conftest import make_entry, set_plug_states
+
+async def _setup_warmer(hass):
+    entry = make_entry()
+    entry.add_to_hass(hass)
+    set_plug_states(hass)
+    assert await async_setup_component(hass, DOMAIN, {})
+    await hass.async_block_till_done()
+    return hass.data[DOMAIN][entry.entry_id]["coordinator"]
+
+async def bench_update_data_steady(hass, bench):
+    """Evaluation with the warmer on, inside its window and nothing to do."""
+    coordinator = await _setup_warmer(hass)
+    result = await bench("coordinator.update_data.steady", coordinator._async_update_data, rounds=5000)
+    assert result["rounds"] == 5000
+
+async def bench_update_data_power_changes(hass, bench):
+    """Evaluation after each power sample, including the state change handler."""
+    coordinator = await _setup_warmer(hass)
+    readings = iter(range(10**9))
+
+    async def sample_and_update():
+        hass.states.async_set("sensor.bench_plug_0_power", str(100 + next(readings) % 40))
+        await coordinator._async_update_data()
+
+    await bench("coordinator.update_data.power_change", sample_and_update, rounds=2000)
+
+async def bench_save_persistent_data(hass, bench):
+    coordinator = await _setup_warmer(hass)
+    await bench("coordinator.save_persistent_data", coordinator.save_persistent_data, rounds=5000)
+
+async def bench_save_persistent_data_forced(hass, bench):
+    """Forced energy checkpoint, the path taken on shutdown."""
+    coordinator = await _setup_warmer(hass)
+    await bench(
+        "coordinator.save_persistent_data.forced",
+        lambda: coordinator.save_persistent_data(force_energy=True),
+        rounds=5000,
+    )
+
+async def bench_load_persistent_data(hass, bench):
+    coordinator = await _setup_warmer(hass)
+    coordinator.save_persistent_data(force_energy=True)
+    await bench("coordinator.load_persistent_data", coordinator.load_persistent_data, rounds=5000)
@@ -0,0 +1,27 @@
+"""Integration setup time for a growing number of config entries."""
+import time
+
+import pytest
+from homeassistant.setup import async_setup_component
+
+from custom_components.towel_warmer_plug.const import DOMAIN
+
+from conftest import make_entry, record, set_plug_states
+
+@pytest.mark.parametrize("entries", [1, 10, 100])
+async def bench_setup_entries(hass, entries):
+    """Wall time from async_setup_component until every entry is loaded."""
+    for index in range(entries):
+        make_entry(index).add_to_hass(hass)
+        set_plug_states(hass, index)
+
+    started = time.perf_counter()
+    assert await async_setup_component(hass, DOMAIN, {})
+    await hass.async_block_till_done()
+    elapsed = time.perf_counter() - started
+
+    # Uma única medição por tamanho: a instalação não se repete no mesmo hass
+    record(f"setup.entries_{entries}", [elapsed])
+    assert len(hass.config_entries.async_entries(DOMAIN)) == entries
+    for entry in hass.config_entries.async_entries(DOMAIN):
+        assert entry.entry_id in hass.data[DOMAIN]
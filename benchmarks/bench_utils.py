@@ -0,0 +1,11 @@
+"""Micro-costs of the helpers used on every save and load."""
+from custom_components.towel_warmer_plug.utils import slugify, _safe_parse_dt
+
+async def bench_slugify(bench):
+    await bench("utils.slugify", lambda: slugify("Casa de Banho Suíte - Toalheiro"), rounds=20000)
+
+async def bench_safe_parse_dt_iso(bench):
+    await bench("utils.safe_parse_dt.iso", lambda: _safe_parse_dt("2025-01-31T22:15:03.123456+00:00"), rounds=20000)
+
+async def bench_safe_parse_dt_none(bench):
+    await bench("utils.safe_parse_dt.none", lambda: _safe_parse_dt(None), rounds=20000)
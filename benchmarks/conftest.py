@@ -0,0 +1,110 @@
+"""Benchmark fixtures.
+
+Run from the repository root:
+
+    pip install -r benchmarks/requirements.txt
+    pytest benchmarks [--bench-json PATH]
+
+Every benchmark records its timings through the bench fixture. When the
+session ends they are written as JSON (benchmarks/results.json by default),
+so runs can be compared before a release.
+"""
+from pathlib import Path
+import inspect
+import json
+import platform
+import statistics
+import sys
+import time
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.towel_warmer_plug.const import (
+    DOMAIN, CONF_NAME, CONF_SWITCH, CONF_POWER, CONF_START_TIME, CONF_END_TIME, CONF_MINIMUM_POWER,
+)
+
+_RESULTS: dict[str, dict] = {}
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--bench-json",
+        default=str(Path(__file__).parent / "results.json"),
+        help="where to write benchmark results",
+    )
+
+def pytest_sessionfinish(session, exitstatus):
+    if not _RESULTS:
+        return
+    path = Path(session.config.getoption("--bench-json"))
+    path.write_text(json.dumps({
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "benchmarks": _RESULTS,
+    }, indent=2))
+
+def _summary(samples: list[float]) -> dict[str, float]:
+    ordered = sorted(samples)
+    mean = statistics.fmean(ordered)
+    return {
+        "rounds": len(ordered),
+        "mean_us": round(mean * 1e6, 3),
+        "median_us": round(statistics.median(ordered) * 1e6, 3),
+        "p95_us": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1e6, 3),
+        "min_us": round(ordered[0] * 1e6, 3),
+        "ops_per_sec": round(1 / mean, 1) if mean else None,
+    }
+
+@pytest.fixture
+def bench():
+    """Time a sync or async callable over a number of rounds."""
+
+    async def run(name: str, func, rounds: int = 1000, warmup: int = 10) -> dict[str, float]:
+        for _ in range(warmup):
+            result = func()
+            if inspect.isawaitable(result):
+                await result
+        samples = []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            result = func()
+            if inspect.isawaitable(result):
+                await result
+            samples.append(time.perf_counter() - started)
+        _RESULTS[name] = _summary(samples)
+        return _RESULTS[name]
+
+    return run
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    yield
+
+def make_entry(index: int = 0) -> MockConfigEntry:
+    """Config entry for a warmer whose window covers the whole day."""
+    name = f"Bench Warmer {index}"
+    return MockConfigEntry(
+        domain=DOMAIN,
+        title=name,
+        data={
+            CONF_NAME: name,
+            CONF_SWITCH: f"switch.bench_plug_{index}",
+            CONF_POWER: f"sensor.bench_plug_{index}_power",
+            CONF_START_TIME: "00:00:00",
+            CONF_END_TIME: "23:59:59",
+            CONF_MINIMUM_POWER: 10.0,
+        },
+    )
+
+def set_plug_states(hass, index: int = 0, switch: str = "on", power: str = "120"):
+    hass.states.async_set(f"switch.bench_plug_{index}", switch)
+    hass.states.async_set(f"sensor.bench_plug_{index}_power", power)
+
+def record(name: str, samples: list[float]):
+    _RESULTS[name] = _summary(samples)
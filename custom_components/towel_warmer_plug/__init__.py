@@ -1,51 +1,210 @@
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers.typing import ConfigType
 from homeassistant.const import Platform
+from homeassistant.helpers.entity_registry import async_get as async_get_entity_registry
+from homeassistant.helpers.device_registry import async_get as async_get_device_registry
+from homeassistant.util import dt as dt_util
+import voluptuous as vol
+import logging
+import time
 
 from .const import (
-    DOMAIN,
+    DOMAIN, DATA_SCHEDULER, DATA_LOAD_MANAGER, DATA_STORE, DATA_ACTUATOR, DATA_METRICS,
     CONF_SWITCH, CONF_POWER,
     CONF_START_TIME, CONF_END_TIME,
-    CONF_NAME
+    CONF_NAME,
+    CONF_POWER_BUDGET, DEFAULT_POWER_BUDGET,
+    CONF_STAGGER_DELAY, DEFAULT_STAGGER_DELAY,
+    CONF_ROTATION_PERIOD, DEFAULT_ROTATION_PERIOD,
+    CONF_DEFAULT_DRAW, DEFAULT_DRAW,
+    CONF_METRICS, DEFAULT_METRICS,
+)
+from .actuator import TowelWarmerActuator
+from .bulk import (
+    CONF_WARMERS, CONF_PATH,
+    validate_warmers, async_apply_updates, async_create_entries,
+    async_import_warmers, log_results, load_warmers_file, is_import_path_allowed,
 )
 from .coordinator import TowelWarmerCoordinator
+from .load_manager import TowelWarmerLoadManager
 from .models import TowelWarmerConfig
+from .scheduler import TowelWarmerScheduler
+from .storage import TowelWarmerStore, TowelWarmerStorage
+
+_LOGGER = logging.getLogger(__name__)
 
 PLATFORMS: list[Platform] = [Platform.SENSOR, Platform.SWITCH]
 
+# Opções globais, partilhadas por todos os warmers
+CONFIG_SCHEMA = vol.Schema(
+    {
+        DOMAIN: vol.Schema({
+            vol.Optional(CONF_POWER_BUDGET, default=DEFAULT_POWER_BUDGET): vol.All(vol.Coerce(float), vol.Range(min=0)),
+            vol.Optional(CONF_STAGGER_DELAY, default=DEFAULT_STAGGER_DELAY): vol.All(vol.Coerce(float), vol.Range(min=0)),
+            vol.Optional(CONF_ROTATION_PERIOD, default=DEFAULT_ROTATION_PERIOD): vol.All(vol.Coerce(int), vol.Range(min=1)),
+            vol.Optional(CONF_DEFAULT_DRAW, default=DEFAULT_DRAW): vol.All(vol.Coerce(float), vol.Range(min=0)),
+            vol.Optional(CONF_METRICS, default=DEFAULT_METRICS): bool,
+            # Validados item a item por bulk.py, para um erro não travar os outros
+            vol.Optional(CONF_WARMERS): list,
+        })
+    },
+    extra=vol.ALLOW_EXTRA,
+)
+
+SERVICE_IMPORT_WARMERS = "import_warmers"
+IMPORT_SERVICE_SCHEMA = vol.Schema(
+    vol.All(
+        {
+            vol.Exclusive(CONF_PATH, "source"): cv.string,
+            vol.Exclusive(CONF_WARMERS, "source"): list,
+        },
+        cv.has_at_least_one_key(CONF_PATH, CONF_WARMERS),
+    )
+)
+
 async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    conf = config.get(DOMAIN, {})
+    hass.data.setdefault(DOMAIN, {})
+    # Um único ficheiro com o estado de todos os warmers, lido uma vez
+    store = TowelWarmerStore(hass)
+    await store.async_load()
+    await store.async_migrate_legacy({
+        entry.entry_id: entry.title for entry in hass.config_entries.async_entries(DOMAIN)
+    })
+    hass.data[DOMAIN][DATA_STORE] = store
+    hass.data[DOMAIN][DATA_SCHEDULER] = TowelWarmerScheduler(hass)
+    hass.data[DOMAIN][DATA_ACTUATOR] = TowelWarmerActuator(hass)
+    hass.data[DOMAIN][DATA_METRICS] = conf.get(CONF_METRICS, DEFAULT_METRICS)
+    hass.data[DOMAIN][DATA_LOAD_MANAGER] = TowelWarmerLoadManager(
+        hass,
+        budget=conf.get(CONF_POWER_BUDGET, DEFAULT_POWER_BUDGET),
+        stagger=conf.get(CONF_STAGGER_DELAY, DEFAULT_STAGGER_DELAY),
+        rotation=conf.get(CONF_ROTATION_PERIOD, DEFAULT_ROTATION_PERIOD) * 60,
+        default_draw=conf.get(CONF_DEFAULT_DRAW, DEFAULT_DRAW),
+    )
+
+    if CONF_WARMERS in conf:
+        # As entradas ainda não arrancaram: atualizar as opções aqui não
+        # causa reloads, e as novas são criadas depois sem bloquear o setup
+        valid, results = validate_warmers(conf[CONF_WARMERS])
+        to_create = async_apply_updates(hass, valid)
+
+        async def _async_create():
+            await async_create_entries(hass, to_create)
+            log_results(results)
+
+        hass.async_create_task(_async_create())
+
+    async def _async_import_service(call: ServiceCall) -> ServiceResponse:
+        if CONF_PATH in call.data:
+            path = hass.config.path(call.data[CONF_PATH])
+            if not is_import_path_allowed(hass, path):
+                raise HomeAssistantError(f"Path {path} is not allowed")
+            try:
+                items = await hass.async_add_executor_job(load_warmers_file, path)
+            except Exception as e:
+                raise HomeAssistantError(f"Could not read {path}: {e}") from e
+        else:
+            items = call.data[CONF_WARMERS]
+        try:
+            results = await async_import_warmers(hass, items)
+        except vol.Invalid as e:
+            raise HomeAssistantError(f"Invalid import: {e}") from e
+        return {"results": results}
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_IMPORT_WARMERS, _async_import_service,
+        schema=IMPORT_SERVICE_SCHEMA, supports_response=SupportsResponse.OPTIONAL,
+    )
     return True
 
-async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    data = {
+def _device_identifiers(hass: HomeAssistant, entity_id: str):
+    """Identifiers of the plug's device, so our entities join it."""
+    entity_entry = async_get_entity_registry(hass).async_get(entity_id)
+    if not entity_entry or not entity_entry.device_id:
+        return None
+    device_entry = async_get_device_registry(hass).async_get(entity_entry.device_id)
+    return device_entry.identifiers if device_entry else None
+
+def _entry_config(entry: ConfigEntry) -> TowelWarmerConfig:
+    return TowelWarmerConfig.from_dict({
         **entry.data,
         **entry.options,
         CONF_NAME: entry.title,  # garante que temos o título como nome interno
-    }
+    })
+
+async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    config = _entry_config(entry)
+    started = time.monotonic()
+    store = hass.data[DOMAIN][DATA_STORE]
+    scheduler = hass.data[DOMAIN][DATA_SCHEDULER]
+    coordinator = TowelWarmerCoordinator(
+        hass, config, scheduler, hass.data[DOMAIN][DATA_LOAD_MANAGER],
+        TowelWarmerStorage(store, entry.entry_id), hass.data[DOMAIN][DATA_ACTUATOR],
+        metrics_enabled=hass.data[DOMAIN][DATA_METRICS],
+    )
+    # O estado guardado tem de estar carregado antes da primeira decisão,
+    # senão um switch ligado pelo próprio warmer parece um override manual
+    await coordinator.load_persistent_data()
+    restored = time.monotonic()
 
-    config = TowelWarmerConfig.from_dict(data)
-    coordinator = TowelWarmerCoordinator(hass, config)
-    await coordinator.async_config_entry_first_refresh()
+    scheduler.async_register(coordinator)
+    try:
+        await coordinator.async_config_entry_first_refresh()
+    except Exception:
+        scheduler.async_unregister(coordinator)
+        hass.data[DOMAIN][DATA_LOAD_MANAGER].async_remove(coordinator, dt_util.utcnow().timestamp())
+        raise
+    coordinator.async_start()
+    refreshed = time.monotonic()
 
-    if DOMAIN not in hass.data:
-        hass.data[DOMAIN] = {}
     hass.data[DOMAIN][entry.entry_id] = {
         "coordinator": coordinator,
+        # Resolvido uma vez por entrada, partilhado pelas plataformas
+        "device_identifiers": _device_identifiers(hass, config.switch_entity),
     }
 
-    # Garante que alterações às opções forçam reload
+    # Alterações às opções são aplicadas sem reload sempre que possível
     entry.async_on_unload(entry.add_update_listener(update_listener))
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    _LOGGER.debug(
+        "%s - Setup took %.1f ms (restore %.1f ms, first refresh %.1f ms, platforms %.1f ms).",
+        config.name,
+        (time.monotonic() - started) * 1000,
+        (restored - started) * 1000,
+        (refreshed - restored) * 1000,
+        (time.monotonic() - refreshed) * 1000,
+    )
     return True
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
+        coordinator = hass.data[DOMAIN].pop(entry.entry_id)["coordinator"]
+        hass.data[DOMAIN][DATA_SCHEDULER].async_unregister(coordinator)
+        hass.data[DOMAIN][DATA_LOAD_MANAGER].async_remove(coordinator, dt_util.utcnow().timestamp())
+        await coordinator.async_shutdown()
     return unload_ok
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry):
+    """Drop the warmer's persisted state when its entry is deleted."""
+    store = hass.data.get(DOMAIN, {}).get(DATA_STORE)
+    if store:
+        store.async_remove(entry.entry_id)
+
 async def update_listener(hass: HomeAssistant, entry: ConfigEntry):
-    """Força o reload da config entry quando as opções são atualizadas."""
-    await hass.config_entries.async_reload(entry.entry_id)
+    """Apply updated options to the running coordinator, reloading only when needed."""
+    runtime = hass.data[DOMAIN].get(entry.entry_id)
+    config = _entry_config(entry)
+    current = runtime["coordinator"].config if runtime else None
+    # Outras entidades ou outro nome mudam as subscrições e os unique_id
+    if current is None or (config.name, config.switch_entity, config.power_sensor) != (
+        current.name, current.switch_entity, current.power_sensor
+    ):
+        await hass.config_entries.async_reload(entry.entry_id)
+        return
+    runtime["coordinator"].async_apply_config(config)
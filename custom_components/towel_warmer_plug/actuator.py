@@ -0,0 +1,177 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import partial
+from typing import TYPE_CHECKING, Optional
+from homeassistant.core import HomeAssistant, CALLBACK_TYPE, Context, State, callback
+from homeassistant.helpers.event import async_call_later
+import logging
+import time
+
+if TYPE_CHECKING:
+    from .coordinator import TowelWarmerCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 3
+RETRY_BACKOFF = 2  # seconds, doubled after each failed attempt
+CONFIRM_TIMEOUT = 15  # seconds for the plug to report the new state
+# Contextos recentes das chamadas da integração, para atribuir mudanças
+CONTEXT_HISTORY = 64
+
+@dataclass(eq=False)
+class PendingCommand:
+    coordinator: "TowelWarmerCoordinator"
+    entity_id: str
+    service: str
+    target: str  # estado esperado do switch: "on" ou "off"
+    context: Optional[Context] = None
+    attempts: int = 0
+    unsub: Optional[CALLBACK_TYPE] = None
+
+class TowelWarmerActuator:
+    """Domain-wide queue that switches plugs without blocking updates.
+
+    Commands issued in the same event loop iteration are sent as one
+    multi-entity service call per service, in a background task. A command
+    stays pending, with its target state and the context of the call, until
+    the plug reports the target state. Failed calls and plugs that do not
+    confirm in time are retried with exponential backoff.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        self.hass = hass
+        self._pending: dict[str, PendingCommand] = {}
+        self._queue: list[PendingCommand] = []
+        self._flush_scheduled = False
+        self._contexts: OrderedDict[str, None] = OrderedDict()
+
+    def pending(self, entity_id: str) -> Optional[PendingCommand]:
+        return self._pending.get(entity_id)
+
+    @callback
+    def async_command(self, coordinator: "TowelWarmerCoordinator", entity_id: str, service: str) -> bool:
+        """Queue a switch command; False if the same one is already pending."""
+        target = "on" if service == "turn_on" else "off"
+        cmd = self._pending.get(entity_id)
+        if cmd is not None:
+            if cmd.target == target:
+                return False
+            self._drop(cmd)
+        cmd = PendingCommand(coordinator, entity_id, service, target)
+        self._pending[entity_id] = cmd
+        self._enqueue(cmd)
+        return True
+
+    def is_own_change(self, new_state: State) -> bool:
+        """Whether a switch state change was caused by this integration.
+
+        Matched on the context of the change, which the switch inherits from
+        our service call. Plugs that report asynchronously use a fresh
+        context, so reaching the target state of a pending command also
+        counts.
+        """
+        context = new_state.context
+        if context.id in self._contexts or (context.parent_id and context.parent_id in self._contexts):
+            return True
+        cmd = self._pending.get(new_state.entity_id)
+        return cmd is not None and new_state.state == cmd.target
+
+    @callback
+    def async_confirm(self, new_state: State) -> Optional[PendingCommand]:
+        """Resolve the pending command once the plug reports its target state."""
+        cmd = self._pending.get(new_state.entity_id)
+        if cmd is None or new_state.state != cmd.target:
+            return None
+        self._drop(cmd)
+        return cmd
+
+    @callback
+    def async_cancel(self, coordinator: "TowelWarmerCoordinator"):
+        for cmd in [c for c in self._pending.values() if c.coordinator is coordinator]:
+            self._drop(cmd)
+
+    def _drop(self, cmd: PendingCommand):
+        if self._pending.get(cmd.entity_id) is cmd:
+            del self._pending[cmd.entity_id]
+        if cmd.unsub:
+            cmd.unsub()
+            cmd.unsub = None
+
+    def _enqueue(self, cmd: PendingCommand):
+        self._queue.append(cmd)
+        if not self._flush_scheduled:
+            # Espera pelo fim da iteração para juntar comandos simultâneos
+            self._flush_scheduled = True
+            self.hass.loop.call_soon(self._flush)
+
+    @callback
+    def _flush(self):
+        self._flush_scheduled = False
+        batches: dict[str, list[PendingCommand]] = {}
+        for cmd in self._queue:
+            if self._pending.get(cmd.entity_id) is cmd:
+                batches.setdefault(cmd.service, []).append(cmd)
+        self._queue.clear()
+
+        for service, cmds in batches.items():
+            context = Context()
+            self._contexts[context.id] = None
+            if len(self._contexts) > CONTEXT_HISTORY:
+                self._contexts.popitem(last=False)
+            for cmd in cmds:
+                cmd.context = context
+                cmd.attempts += 1
+            self.hass.async_create_task(self._async_call(service, cmds, context))
+
+    async def _async_call(self, service: str, cmds: list[PendingCommand], context: Context):
+        entity_ids = [cmd.entity_id for cmd in cmds]
+        started = time.perf_counter()
+        try:
+            await self.hass.services.async_call(
+                "switch", service, {"entity_id": entity_ids}, blocking=True, context=context
+            )
+        except Exception as e:
+            _LOGGER.warning("Switch %s failed for %s: %s", service, ", ".join(entity_ids), e)
+            for cmd in cmds:
+                cmd.coordinator.metrics.count("service_failures")
+                self._retry(cmd)
+            return
+        finally:
+            elapsed = time.perf_counter() - started
+            for cmd in cmds:
+                cmd.coordinator.metrics.count("service_calls")
+                cmd.coordinator.metrics.observe("service_call", elapsed)
+
+        for cmd in cmds:
+            if self._pending.get(cmd.entity_id) is cmd:
+                cmd.unsub = async_call_later(self.hass, CONFIRM_TIMEOUT, partial(self._handle_timeout, cmd))
+
+    @callback
+    def _handle_timeout(self, cmd: PendingCommand, _now):
+        cmd.unsub = None
+        state = self.hass.states.get(cmd.entity_id)
+        if state is not None and state.state == cmd.target:
+            self._drop(cmd)
+            return
+        _LOGGER.warning("%s - Plug did not report '%s' after %s.", cmd.coordinator.config.name, cmd.target, cmd.service)
+        self._retry(cmd)
+
+    @callback
+    def _retry(self, cmd: PendingCommand):
+        if self._pending.get(cmd.entity_id) is not cmd:
+            return
+        if cmd.attempts >= MAX_ATTEMPTS:
+            _LOGGER.error("%s - Giving up on %s after %d attempts.", cmd.coordinator.config.name, cmd.service, cmd.attempts)
+            self._drop(cmd)
+            cmd.coordinator.metrics.count("commands_failed")
+            cmd.coordinator.async_command_failed(cmd)
+            return
+        cmd.coordinator.metrics.count("retries")
+        delay = RETRY_BACKOFF * 2 ** (cmd.attempts - 1)
+        cmd.unsub = async_call_later(self.hass, delay, partial(self._handle_backoff, cmd))
+
+    @callback
+    def _handle_backoff(self, cmd: PendingCommand, _now):
+        cmd.unsub = None
+        if self._pending.get(cmd.entity_id) is cmd:
+            self._enqueue(cmd)
@@ -0,0 +1,190 @@
+"""Bulk import of towel warmers from YAML or JSON.
+
+Each item is validated on its own, so one bad warmer does not block the
+rest. Valid items update the entry with the same name, or create a new one
+through the config flow's import step. Entries whose settings are unchanged
+are left alone; changed ones are applied by their own update listeners.
+"""
+from datetime import time
+from typing import Any, Optional
+import asyncio
+import json
+import logging
+import os
+
+from homeassistant.config_entries import ConfigEntry, SOURCE_IMPORT
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import config_validation as cv
+from homeassistant.util.yaml import load_yaml
+import voluptuous as vol
+from voluptuous.humanize import humanize_error
+
+from .const import (
+    DOMAIN, CONF_NAME, CONF_SWITCH, CONF_POWER,
+    CONF_START_TIME, CONF_END_TIME,
+    DEFAULT_START_TIME, DEFAULT_END_TIME,
+    CONF_WEEKLY_SCHEDULE, DEFAULT_WEEKLY_SCHEDULE,
+    CONF_MINIMUM_POWER, DEFAULT_MINIMUM_POWER,
+    CONF_MANUAL_MAX_DURATION, DEFAULT_MANUAL_MAX_DURATION,
+    CONF_MALFUNCTION_WINDOW, DEFAULT_MALFUNCTION_WINDOW,
+    CONF_PREHEAT, DEFAULT_PREHEAT,
+    CONF_ECO_MODE, DEFAULT_ECO_MODE,
+)
+from .schedule import parse_time, parse_weekly_schedule
+from .utils import slugify
+
+_LOGGER = logging.getLogger(__name__)
+
+CONF_WARMERS = "warmers"
+CONF_PATH = "path"
+
+def _time_string(value: Any) -> str:
+    # Em YAML 1.1, 18:00 sem aspas é lido como o inteiro 1080
+    if isinstance(value, int):
+        raise vol.Invalid("times must be quoted, e.g. '18:00'")
+    try:
+        parsed = parse_time(value)
+    except ValueError as e:
+        raise vol.Invalid(str(e)) from e
+    return time(parsed.hour, parsed.minute, parsed.second).isoformat()
+
+def _weekly_schedule(value: Any) -> str:
+    spec = str(value or "").strip()
+    if spec:
+        try:
+            parse_weekly_schedule(spec)
+        except ValueError as e:
+            raise vol.Invalid(f"invalid weekly schedule: {e}") from e
+    return spec
+
+# Mesmos limites que o config flow
+WARMER_SCHEMA = vol.Schema({
+    vol.Required(CONF_NAME): vol.All(cv.string, vol.Length(min=1)),
+    vol.Required(CONF_SWITCH): cv.entity_domain("switch"),
+    vol.Required(CONF_POWER): cv.entity_domain("sensor"),
+    vol.Optional(CONF_MINIMUM_POWER, default=DEFAULT_MINIMUM_POWER): vol.All(vol.Coerce(float), vol.Range(min=0, max=500)),
+    vol.Optional(CONF_START_TIME, default=DEFAULT_START_TIME): _time_string,
+    vol.Optional(CONF_END_TIME, default=DEFAULT_END_TIME): _time_string,
+    vol.Optional(CONF_WEEKLY_SCHEDULE, default=DEFAULT_WEEKLY_SCHEDULE): _weekly_schedule,
+    vol.Optional(CONF_MANUAL_MAX_DURATION, default=DEFAULT_MANUAL_MAX_DURATION): vol.All(vol.Coerce(int), vol.Range(min=1, max=360)),
+    vol.Optional(CONF_MALFUNCTION_WINDOW, default=DEFAULT_MALFUNCTION_WINDOW): vol.All(vol.Coerce(int), vol.Range(min=10, max=3600)),
+    vol.Optional(CONF_PREHEAT, default=DEFAULT_PREHEAT): cv.boolean,
+    vol.Optional(CONF_ECO_MODE, default=DEFAULT_ECO_MODE): cv.boolean,
+})
+
+Pending = list[tuple[dict[str, Any], dict[str, Any]]]  # (warmer, its result)
+
+def validate_warmers(items: Any) -> tuple[Pending, list[dict[str, Any]]]:
+    """Validate raw items; returns (valid warmers with their results, all results).
+
+    Results are in input order; valid items get their status later.
+    """
+    if not isinstance(items, list):
+        raise vol.Invalid("expected a list of warmers")
+    valid: Pending = []
+    results: list[dict[str, Any]] = []
+    names: set[str] = set()
+    switches: set[str] = set()
+    for index, item in enumerate(items):
+        name = item.get(CONF_NAME) if isinstance(item, dict) else None
+        result: dict[str, Any] = {"index": index, "name": name}
+        results.append(result)
+        try:
+            warmer = WARMER_SCHEMA(item)
+        except vol.Invalid as e:
+            result.update(status="error", error=humanize_error(item, e) if isinstance(item, dict) else str(e))
+            continue
+        key = slugify(warmer[CONF_NAME])
+        if key in names:
+            result.update(status="error", error=f"duplicate name '{warmer[CONF_NAME]}'")
+            continue
+        if warmer[CONF_SWITCH] in switches:
+            result.update(status="error", error=f"switch {warmer[CONF_SWITCH]} is already used by another warmer")
+            continue
+        names.add(key)
+        switches.add(warmer[CONF_SWITCH])
+        valid.append((warmer, result))
+    return valid, results
+
+def _find_entry(hass: HomeAssistant, name: str) -> Optional[ConfigEntry]:
+    key = slugify(name)
+    for entry in hass.config_entries.async_entries(DOMAIN):
+        if slugify(entry.title) == key:
+            return entry
+    return None
+
+@callback
+def async_apply_updates(hass: HomeAssistant, valid: Pending) -> Pending:
+    """Update existing entries in place; returns the warmers still to create.
+
+    Settings go to the entry's options, which take precedence over its data.
+    Unchanged entries are not touched, so their update listeners do not run.
+    """
+    to_create: Pending = []
+    for warmer, result in valid:
+        entry = _find_entry(hass, warmer[CONF_NAME])
+        if entry is None:
+            to_create.append((warmer, result))
+            continue
+        settings = {k: v for k, v in warmer.items() if k != CONF_NAME}
+        current = {**entry.data, **entry.options}
+        if all(current.get(k) == v for k, v in settings.items()):
+            result.update(status="unchanged", entry_id=entry.entry_id)
+            continue
+        hass.config_entries.async_update_entry(entry, options={**entry.options, **settings})
+        result.update(status="updated", entry_id=entry.entry_id)
+    return to_create
+
+async def async_create_entries(hass: HomeAssistant, to_create: Pending):
+    """Create new entries through the import step, concurrently."""
+    async def create(warmer: dict[str, Any], result: dict[str, Any]):
+        try:
+            flow = await hass.config_entries.flow.async_init(
+                DOMAIN, context={"source": SOURCE_IMPORT}, data=warmer
+            )
+        except Exception as e:
+            result.update(status="error", error=str(e))
+            return
+        if flow.get("type") == "create_entry":
+            result.update(status="created", entry_id=flow["result"].entry_id)
+        else:
+            result.update(status="error", error=flow.get("reason", "not created"))
+
+    await asyncio.gather(*(create(warmer, result) for warmer, result in to_create))
+
+async def async_import_warmers(hass: HomeAssistant, items: Any) -> list[dict[str, Any]]:
+    """Validate, update and create warmers in one pass; returns per-item results."""
+    valid, results = validate_warmers(items)
+    to_create = async_apply_updates(hass, valid)
+    await async_create_entries(hass, to_create)
+    log_results(results)
+    return results
+
+def log_results(results: list[dict[str, Any]]):
+    counts: dict[str, int] = {}
+    for result in results:
+        status = result.get("status", "error")
+        counts[status] = counts.get(status, 0) + 1
+        if status == "error":
+            _LOGGER.error("Towel warmer import, item %d (%s): %s", result["index"], result.get("name"), result.get("error"))
+    _LOGGER.info("Towel warmer import: %s", ", ".join(f"{n} {s}" for s, n in sorted(counts.items())) or "nothing to do")
+
+def is_import_path_allowed(hass: HomeAssistant, path: str) -> bool:
+    """Files under the configuration directory or an allowed external one."""
+    config_dir = os.path.realpath(hass.config.config_dir)
+    # realpath segue links e "..", por isso não se sai da pasta por engano
+    if os.path.commonpath([config_dir, os.path.realpath(path)]) == config_dir:
+        return True
+    return hass.config.is_allowed_path(path)
+
+def load_warmers_file(path: str) -> Any:
+    """Read a list of warmers from a JSON or YAML file (runs in the executor)."""
+    if path.endswith(".json"):
+        with open(path, encoding="utf-8") as handle:
+            data = json.load(handle)
+    else:
+        data = load_yaml(path)
+    # Aceita a lista diretamente ou dentro de "warmers"
+    if isinstance(data, dict):
+        data = data.get(CONF_WARMERS)
+    return data
@@ -7,12 +7,28 @@ from .const import (
     DOMAIN, CONF_NAME, CONF_SWITCH, CONF_POWER,
     CONF_START_TIME, CONF_END_TIME,
     DEFAULT_START_TIME, DEFAULT_END_TIME,
+    CONF_WEEKLY_SCHEDULE, DEFAULT_WEEKLY_SCHEDULE,
     CONF_MINIMUM_POWER, DEFAULT_MINIMUM_POWER,
+    CONF_MALFUNCTION_WINDOW, DEFAULT_MALFUNCTION_WINDOW,
+    CONF_PREHEAT, DEFAULT_PREHEAT,
+    CONF_ECO_MODE, DEFAULT_ECO_MODE,
 )
+from .schedule import parse_weekly_schedule
+from .utils import slugify
 
 CONF_MANUAL_MAX_DURATION = "manual_max_duration"
 DEFAULT_MANUAL_MAX_DURATION = 60  # minutos
 
+def _validate_schedule(user_input) -> dict[str, str]:
+    weekly = (user_input.get(CONF_WEEKLY_SCHEDULE) or "").strip()
+    if not weekly:
+        return {}
+    try:
+        parse_weekly_schedule(weekly)
+    except ValueError:
+        return {CONF_WEEKLY_SCHEDULE: "invalid_schedule"}
+    return {}
+
 class TowelWarmerConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     VERSION = 1
 
@@ -21,15 +37,26 @@ class TowelWarmerConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     def async_get_options_flow(config_entry):
         return TowelWarmerOptionsFlowHandler(config_entry)
 
+    async def async_step_import(self, import_data):
+        """Create an entry for a warmer validated by the bulk import."""
+        for entry in self._async_current_entries():
+            if slugify(entry.title) == slugify(import_data[CONF_NAME]):
+                return self.async_abort(reason="already_configured")
+        return self.async_create_entry(title=import_data[CONF_NAME], data=import_data)
+
     async def async_step_user(self, user_input=None):
+        errors = {}
         if user_input is not None:
-            return self.async_create_entry(
-                title=user_input[CONF_NAME],
-                data=user_input
-            )
+            errors = _validate_schedule(user_input)
+            if not errors:
+                return self.async_create_entry(
+                    title=user_input[CONF_NAME],
+                    data=user_input
+                )
 
         return self.async_show_form(
             step_id="user",
+            errors=errors,
             data_schema=vol.Schema({
                 vol.Required(CONF_NAME): selector.TextSelector(),
                 vol.Required(CONF_SWITCH): selector.EntitySelector(
@@ -43,9 +70,17 @@ class TowelWarmerConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 ),
                 vol.Optional(CONF_START_TIME, default=DEFAULT_START_TIME): selector.TimeSelector(),
                 vol.Optional(CONF_END_TIME, default=DEFAULT_END_TIME): selector.TimeSelector(),
+                vol.Optional(CONF_WEEKLY_SCHEDULE, default=DEFAULT_WEEKLY_SCHEDULE): selector.TextSelector(
+                    selector.TextSelectorConfig(multiline=True)
+                ),
                 vol.Optional(CONF_MANUAL_MAX_DURATION, default=DEFAULT_MANUAL_MAX_DURATION): selector.NumberSelector(
                     selector.NumberSelectorConfig(min=1, max=360, step=1, unit_of_measurement="min", mode=selector.NumberSelectorMode.BOX)
                 ),
+                vol.Optional(CONF_MALFUNCTION_WINDOW, default=DEFAULT_MALFUNCTION_WINDOW): selector.NumberSelector(
+                    selector.NumberSelectorConfig(min=10, max=3600, step=1, unit_of_measurement="s", mode=selector.NumberSelectorMode.BOX)
+                ),
+                vol.Optional(CONF_PREHEAT, default=DEFAULT_PREHEAT): selector.BooleanSelector(),
+                vol.Optional(CONF_ECO_MODE, default=DEFAULT_ECO_MODE): selector.BooleanSelector(),
             })
         )
 
@@ -54,14 +89,18 @@ class TowelWarmerOptionsFlowHandler(config_entries.OptionsFlow):
         self._config_entry = config_entry
 
     async def async_step_init(self, user_input=None):
+        errors = {}
         if user_input is not None:
-            return self.async_create_entry(title="", data=user_input)
+            errors = _validate_schedule(user_input)
+            if not errors:
+                return self.async_create_entry(title="", data=user_input)
 
         options = self.config_entry.options
         data_fallback = self.config_entry.data
 
         return self.async_show_form(
             step_id="init",
+            errors=errors,
             data_schema=vol.Schema({
                 vol.Optional(
                     CONF_MINIMUM_POWER,
@@ -77,12 +116,32 @@ class TowelWarmerOptionsFlowHandler(config_entries.OptionsFlow):
                     CONF_END_TIME,
                     default=options.get(CONF_END_TIME, data_fallback.get(CONF_END_TIME, DEFAULT_END_TIME))
                 ): selector.TimeSelector(),
+                vol.Optional(
+                    CONF_WEEKLY_SCHEDULE,
+                    default=options.get(CONF_WEEKLY_SCHEDULE, data_fallback.get(CONF_WEEKLY_SCHEDULE, DEFAULT_WEEKLY_SCHEDULE))
+                ): selector.TextSelector(
+                    selector.TextSelectorConfig(multiline=True)
+                ),
                 vol.Optional(
                     CONF_MANUAL_MAX_DURATION,
                     default=options.get(CONF_MANUAL_MAX_DURATION, data_fallback.get(CONF_MANUAL_MAX_DURATION, DEFAULT_MANUAL_MAX_DURATION))
                 ): selector.NumberSelector(
                     selector.NumberSelectorConfig(min=1, max=360, step=1, unit_of_measurement="min", mode=selector.NumberSelectorMode.BOX)
                 ),
+                vol.Optional(
+                    CONF_MALFUNCTION_WINDOW,
+                    default=options.get(CONF_MALFUNCTION_WINDOW, data_fallback.get(CONF_MALFUNCTION_WINDOW, DEFAULT_MALFUNCTION_WINDOW))
+                ): selector.NumberSelector(
+                    selector.NumberSelectorConfig(min=10, max=3600, step=1, unit_of_measurement="s", mode=selector.NumberSelectorMode.BOX)
+                ),
+                vol.Optional(
+                    CONF_PREHEAT,
+                    default=options.get(CONF_PREHEAT, data_fallback.get(CONF_PREHEAT, DEFAULT_PREHEAT))
+                ): selector.BooleanSelector(),
+                vol.Optional(
+                    CONF_ECO_MODE,
+                    default=options.get(CONF_ECO_MODE, data_fallback.get(CONF_ECO_MODE, DEFAULT_ECO_MODE))
+                ): selector.BooleanSelector(),
             })
         )
         
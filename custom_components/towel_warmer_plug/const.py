@@ -1,5 +1,11 @@
 DOMAIN = "towel_warmer_plug"
 
+DATA_SCHEDULER = "scheduler"
+DATA_LOAD_MANAGER = "load_manager"
+DATA_STORE = "store"
+DATA_ACTUATOR = "actuator"
+DATA_METRICS = "metrics"
+
 CONF_NAME = "name"
 CONF_SWITCH = "switch_entity"
 CONF_POWER = "power_sensor"
@@ -9,8 +15,40 @@ CONF_END_TIME = "end_time"
 DEFAULT_START_TIME = "09:00:00"
 DEFAULT_END_TIME = "20:00:00"
 
+CONF_WEEKLY_SCHEDULE = "weekly_schedule"
+DEFAULT_WEEKLY_SCHEDULE = ""
+
 CONF_MINIMUM_POWER = "minimum_power"
 DEFAULT_MINIMUM_POWER = 10.0
 
 CONF_MANUAL_MAX_DURATION = "manual_max_duration"
-DEFAULT_MANUAL_MAX_DURATION = 60  # minutes 
\ No newline at end of file
+DEFAULT_MANUAL_MAX_DURATION = 60  # minutes
+
+CONF_MALFUNCTION_WINDOW = "malfunction_window"
+DEFAULT_MALFUNCTION_WINDOW = 60  # seconds
+
+CONF_PREHEAT = "preheat"
+DEFAULT_PREHEAT = False
+
+CONF_ECO_MODE = "eco_mode"
+DEFAULT_ECO_MODE = False
+ECO_IDLE_EXTENSION = 0.5  # fração extra de cada repouso do termóstato
+
+POWER_BUFFER_SIZE = 256
+POWER_EWMA_TAU = 30  # seconds
+POWER_FILTER_WINDOW = 10  # seconds; leituras mais curtas do que metade são picos
+
+CONF_POWER_BUDGET = "power_budget"
+DEFAULT_POWER_BUDGET = 0  # W, 0 = unlimited
+CONF_STAGGER_DELAY = "stagger_delay"
+DEFAULT_STAGGER_DELAY = 2  # seconds
+CONF_ROTATION_PERIOD = "rotation_period"
+DEFAULT_ROTATION_PERIOD = 15  # minutes
+CONF_DEFAULT_DRAW = "default_draw"
+DEFAULT_DRAW = 150  # W, until the real draw is learned
+CONF_METRICS = "metrics"
+DEFAULT_METRICS = True
+REFRESH_COOLDOWN = 0.5  # seconds
+
+STORAGE_VERSION = 1
+STORAGE_SAVE_DELAY = 10  # seconds
@@ -0,0 +1,163 @@
+"""Towel warmer control logic, independent of Home Assistant.
+
+The coordinator feeds plain inputs (switch state, power, time as a POSIX
+timestamp, schedule and auto flags) into step() and applies the returned
+actions. Nothing here touches hass, so the same logic can be driven by the
+simulation harness or by offline replays.
+"""
+from enum import Enum
+from typing import NamedTuple, Optional
+
+from .const import DEFAULT_MALFUNCTION_WINDOW
+
+class Action(Enum):
+    SCHEDULE_ON = "schedule_on"
+    SCHEDULE_OFF = "schedule_off"
+    OVERRIDE_EXPIRED = "override_expired"
+    LOAD_SHED = "load_shed"
+    ECO_PAUSE = "eco_pause"
+
+    @property
+    def service(self) -> str:
+        return "turn_on" if self is Action.SCHEDULE_ON else "turn_off"
+
+class ControlParams(NamedTuple):
+    minimum_power: float
+    manual_max_duration: float  # seconds
+    malfunction_delay: float = DEFAULT_MALFUNCTION_WINDOW  # seconds
+
+    @staticmethod
+    def from_config(config) -> "ControlParams":
+        return ControlParams(
+            minimum_power=float(config.minimum_power),
+            manual_max_duration=float(config.manual_max_duration) * 60,
+            malfunction_delay=float(config.malfunction_window),
+        )
+
+class ControlState(NamedTuple):
+    last_auto_on: Optional[float] = None
+    power_low_since: Optional[float] = None
+    manual_override: bool = False
+    manual_override_since: Optional[float] = None
+    last_switch_state: Optional[str] = None
+    auto_turning_on: bool = False  # ligado pela integração, à espera de confirmação
+
+class Decision(NamedTuple):
+    actions: tuple[Action, ...]
+    is_on: bool
+    is_malfunction: bool
+    waiting: bool = False  # queria ligar mas não tinha autorização
+
+_NO_ACTIONS: tuple[Action, ...] = ()
+# Decisões sem ações são imutáveis, reutilizadas em vez de criadas a cada passo
+_IDLE_DECISIONS = {
+    (is_on, is_malfunction): Decision(_NO_ACTIONS, is_on, is_malfunction)
+    for is_on in (False, True)
+    for is_malfunction in (False, True)
+}
+
+def switch_changed(state: ControlState, now: float, switch_state: str, own: bool) -> ControlState:
+    """Attribute one switch state change.
+
+    own tells whether the change was requested by the integration. Turning
+    on by anyone else starts a manual override; turning off ends it.
+    """
+    if switch_state == state.last_switch_state:
+        return state
+    manual_override, manual_override_since = state.manual_override, state.manual_override_since
+    if switch_state == "on" and not own:
+        manual_override, manual_override_since = True, now
+    elif switch_state == "off":
+        manual_override, manual_override_since = False, None
+    return state._replace(
+        manual_override=manual_override,
+        manual_override_since=manual_override_since,
+        last_switch_state=switch_state,
+        # A mudança pedida foi confirmada pelo switch
+        auto_turning_on=False,
+    )
+
+def step(
+    params: ControlParams,
+    state: ControlState,
+    now: float,
+    switch_state: str,
+    power: float,
+    inside_schedule: bool,
+    auto_enabled: bool,
+    can_turn_on: bool = True,
+) -> tuple[ControlState, Decision]:
+    """Advance the control state by one evaluation.
+
+    Returns the new state (the same object when nothing changed) and the
+    decision: actions to apply in order, plus the derived is_on and
+    is_malfunction flags. When a scheduled turn-on is due but can_turn_on is
+    False, no action is taken and the decision is marked as waiting.
+    """
+    # Sem eventos (simulação, replay), a mudança é detetada entre avaliações
+    if state.last_switch_state is not None and state.last_switch_state != switch_state:
+        state = switch_changed(state, now, switch_state, state.auto_turning_on)
+    (last_auto_on, power_low_since, manual_override, manual_override_since,
+     previous_state, auto_turning_on) = state
+    actions = _NO_ACTIONS
+    is_on = switch_state == "on"
+
+    if manual_override and manual_override_since is not None:
+        if now - manual_override_since > params.manual_max_duration:
+            actions = (Action.OVERRIDE_EXPIRED,)
+            manual_override = False
+            manual_override_since = None
+            is_on = False
+
+    if is_on and power < params.minimum_power:
+        if power_low_since is None:
+            power_low_since = now
+    else:
+        power_low_since = None
+
+    is_malfunction = power_low_since is not None and now - power_low_since >= params.malfunction_delay
+
+    waiting = False
+    if auto_enabled:
+        if inside_schedule and not is_on and not can_turn_on:
+            waiting = True
+        elif inside_schedule and not is_on:
+            actions += (Action.SCHEDULE_ON,)
+            auto_turning_on = True
+            last_auto_on = now
+            manual_override = False
+            manual_override_since = None
+        elif not inside_schedule and is_on and not manual_override:
+            actions += (Action.SCHEDULE_OFF,)
+            manual_override = False
+            manual_override_since = None
+
+    if (
+        power_low_since == state[1]
+        and manual_override == state[2]
+        and manual_override_since == state[3]
+        and switch_state == previous_state
+        and auto_turning_on == state[5]
+        and last_auto_on == state[0]
+    ):
+        new_state = state
+    else:
+        new_state = ControlState(
+            last_auto_on, power_low_since, manual_override, manual_override_since,
+            switch_state, auto_turning_on,
+        )
+    if actions or waiting:
+        return new_state, Decision(actions, is_on, is_malfunction, waiting)
+    return new_state, _IDLE_DECISIONS[is_on, is_malfunction]
+
+def next_deadline(params: ControlParams, state: ControlState, now: float) -> Optional[float]:
+    """Earliest time at which step() would decide differently on its own."""
+    deadlines = []
+    if state.manual_override and state.manual_override_since is not None:
+        # O limite é estrito, avalia logo a seguir
+        deadlines.append(state.manual_override_since + params.manual_max_duration + 1)
+    if state.power_low_since is not None:
+        malfunction_at = state.power_low_since + params.malfunction_delay
+        if malfunction_at > now:
+            deadlines.append(malfunction_at)
+    return min(deadlines) if deadlines else None
@@ -1,39 +1,270 @@
-from datetime import datetime, timedelta
-from homeassistant.core import HomeAssistant
+from datetime import datetime
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import HomeAssistant, Event, State, callback
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
-from homeassistant.helpers.entity_component import DEFAULT_SCAN_INTERVAL
-from homeassistant.helpers.storage import Store
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.event import async_track_state_change_event
 from homeassistant.util import dt as dt_util
 import logging
+import time
 
 from .const import *
+from .actuator import TowelWarmerActuator, PendingCommand
+from .control import Action, ControlParams, ControlState, step, next_deadline, switch_changed
+from .dutycycle import DutyCycleDetector, FALL
+from .energy import EnergyMeter
+from .load_manager import TowelWarmerLoadManager
+from .metrics import WarmerMetrics
+from .preheat import HeatUpModel
 from .models import TowelWarmerConfig
-from .utils import slugify, _safe_parse_dt
+from .scheduler import TowelWarmerScheduler
+from .stats import PowerStats
+from .storage import TowelWarmerStorage
+from .utils import _safe_parse_dt, _isoformat_ts, _local_day_start
 
 _LOGGER = logging.getLogger(__name__)
 
+ACTION_MESSAGES = {
+    Action.SCHEDULE_ON: "Inside schedule. Turning on towel warmer...",
+    Action.SCHEDULE_OFF: "Outside schedule. Turning off towel warmer...",
+    Action.OVERRIDE_EXPIRED: "Manual override exceeded maximum duration. Turning off.",
+    Action.LOAD_SHED: "Yielding power budget to a waiting towel warmer. Turning off.",
+    Action.ECO_PAUSE: "Thermostat idle. Eco mode pausing towel warmer...",
+}
+
+def _timestamp(value) -> float | None:
+    parsed = _safe_parse_dt(value)
+    return parsed.timestamp() if parsed else None
+
 class TowelWarmerCoordinator(DataUpdateCoordinator):
-    def __init__(self, hass: HomeAssistant, config: TowelWarmerConfig):
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        config: TowelWarmerConfig,
+        scheduler: TowelWarmerScheduler,
+        load_manager: TowelWarmerLoadManager,
+        storage: TowelWarmerStorage,
+        actuator: TowelWarmerActuator,
+        metrics_enabled: bool = True,
+    ):
         self.hass = hass
         self.config = config
-        self.storage = Store(hass, 1, f"{DOMAIN}_{slugify(config.name)}")
-        self._last_auto_on = None
-        self._power_low_since = None
-        self._manual_override = False
-        self._manual_override_since = None
-        self._last_switch_state = None
-        self._auto_turning_on = False
+        self.scheduler = scheduler
+        self.load_manager = load_manager
+        self.storage = storage
+        self.actuator = actuator
+        self.metrics = WarmerMetrics(metrics_enabled)
+        self._params = ControlParams.from_config(config)
+        self._state = ControlState()
+        self.power_stats = PowerStats(
+            window=config.malfunction_window,
+            threshold=config.minimum_power,
+            capacity=POWER_BUFFER_SIZE,
+            ewma_tau=POWER_EWMA_TAU,
+            filter_window=POWER_FILTER_WINDOW,
+        )
+        self.energy = EnergyMeter(config.minimum_power, _local_day_start)
+        self.preheat = HeatUpModel(config.minimum_power)
+        self.duty = DutyCycleDetector(config.minimum_power)
+        self._eco_pause_until = None
+        self._unsub_state = None
+        self._unsub_stop = None
+        self.auto_enabled = False  # atualizado pelo switch de controlo ao registar-se
+        self._last_transition = None  # fronteira do horário anunciada na última avaliação
+        self._actuation_boundary = None  # fronteira que originou o comando pendente
 
+        # Sem polling: as atualizações são disparadas por eventos e pelo scheduler
         super().__init__(
             hass,
             _LOGGER,
             name=f"TowelWarmerCoordinator_{config.name}",
-            update_interval=DEFAULT_SCAN_INTERVAL,
+            update_interval=None,
+            request_refresh_debouncer=Debouncer(
+                hass, _LOGGER, cooldown=REFRESH_COOLDOWN, immediate=True
+            ),
         )
 
-        hass.loop.create_task(self.load_persistent_data())
+    @callback
+    def async_start(self):
+        """Subscribe to the entities that drive the control loop."""
+        if self._unsub_state:
+            return
+        self._unsub_state = async_track_state_change_event(
+            self.hass,
+            [self.config.switch_entity, self.config.power_sensor],
+            self._handle_state_change,
+        )
+        # Ao parar o HA, grava a energia exata para o total não recuar no arranque
+        self._unsub_stop = self.hass.bus.async_listen_once(
+            EVENT_HOMEASSISTANT_STOP, self._async_handle_stop
+        )
+
+    @callback
+    def async_stop(self):
+        """Drop state subscriptions and any pending deadline."""
+        if self._unsub_state:
+            self._unsub_state()
+            self._unsub_state = None
+        if self._unsub_stop:
+            self._unsub_stop()
+            self._unsub_stop = None
+        self.scheduler.async_cancel(self)
+        self.actuator.async_cancel(self)
+
+    async def async_shutdown(self):
+        self.async_stop()
+        self.save_persistent_data(force_energy=True)
+        await self.storage.async_flush()
+        await super().async_shutdown()
+
+    async def _async_handle_stop(self, event: Event):
+        self._unsub_stop = None
+        self.save_persistent_data(force_energy=True)
+        await self.storage.async_flush()
+
+    @callback
+    def _handle_state_change(self, event: Event):
+        _LOGGER.debug(f"{self.config.name} - State change on {event.data.get('entity_id')}. Requesting refresh.")
+        new_state = event.data.get("new_state")
+        if event.data.get("entity_id") == self.config.switch_entity and new_state is not None:
+            self._handle_switch_change(event.data.get("old_state"), new_state)
+        elif event.data.get("entity_id") == self.config.power_sensor and new_state is not None:
+            try:
+                power = float(new_state.state)
+            except ValueError:
+                pass
+            else:
+                ts = new_state.last_updated.timestamp()
+                self.power_stats.add(ts, power)
+                self.energy.add(ts, power)
+                self.preheat.add(ts, power)
+                self.load_manager.observe(self, power)
+                if self._state.last_switch_state == "on":
+                    self._handle_duty_sample(ts, power)
+        self.hass.async_create_task(self.async_request_refresh())
+
+    @callback
+    def async_set_auto_enabled(self, enabled: bool, refresh: bool = True):
+        """Pushed by the control switch whenever it changes."""
+        if enabled == self.auto_enabled:
+            return
+        self.auto_enabled = enabled
+        _LOGGER.debug(f"{self.config.name} - Automatic control {'enabled' if enabled else 'disabled'}.")
+        if refresh:
+            self.hass.async_create_task(self.async_request_refresh())
+
+    @callback
+    def _handle_switch_change(self, old_state: State | None, new_state: State):
+        """Attribute each switch change as it happens, not between updates."""
+        own = self.actuator.is_own_change(new_state)
+        if self.actuator.async_confirm(new_state) and self._actuation_boundary is not None:
+            self.metrics.observe("actuation_lag", new_state.last_changed.timestamp() - self._actuation_boundary)
+            self._actuation_boundary = None
+        if new_state.state not in ("on", "off"):
+            return
+        # Mudanças só de atributos não ligam nem desligam a tomada
+        if old_state is None or old_state.state != new_state.state:
+            self.preheat.switched(new_state.last_changed.timestamp(), new_state.state == "on")
+            self.duty.switched(new_state.last_changed.timestamp(), new_state.state == "on")
+        if self._state.last_switch_state is None:
+            return
+        previous = self._state
+        self._state = switch_changed(previous, new_state.last_changed.timestamp(), new_state.state, own)
+        if previous.manual_override != self._state.manual_override:
+            _LOGGER.debug(f"{self.config.name} - Manual override {'detected' if self._state.manual_override else 'cleared'} (context {new_state.context.id}).")
+
+    @callback
+    def _handle_duty_sample(self, ts: float, power: float):
+        self._handle_duty_edge(self.duty.add(ts, power))
+
+    def _handle_duty_edge(self, edge: str | None):
+        # O detetor só confirma a descida depois de MIN_PHASE em repouso
+        if edge == FALL and self.config.eco_mode:
+            pause = self.duty.pause_length(ECO_IDLE_EXTENSION)
+            if pause:
+                self._eco_pause_until = self.duty.phase_start + pause
+
+    def _eco_paused(self, now: float, inside: bool, auto_enabled: bool) -> bool:
+        """Whether an eco pause is in effect, dropping it once it no longer applies."""
+        if self._eco_pause_until is None:
+            return False
+        if now >= self._eco_pause_until or not inside or not auto_enabled or self._state.manual_override:
+            self._eco_pause_until = None
+            return False
+        return True
+
+    @callback
+    def async_apply_config(self, config: TowelWarmerConfig):
+        """Apply changed options in place, keeping override and malfunction state.
+
+        The switch and power sensor must be unchanged; anything else only feeds
+        thresholds, the schedule and deadlines, which the next refresh rearms.
+        """
+        previous, self.config = self.config, config
+        self._params = ControlParams.from_config(config)
+        if config.minimum_power != previous.minimum_power:
+            self.power_stats.set_threshold(config.minimum_power)
+            self.energy.threshold = config.minimum_power
+            self.preheat.threshold = config.minimum_power
+            self.duty.threshold = config.minimum_power
+        if config.malfunction_window != previous.malfunction_window:
+            self.power_stats.set_window(config.malfunction_window)
+        if not config.eco_mode:
+            self._eco_pause_until = None
+        # A fronteira anunciada pertencia ao horário antigo
+        self._last_transition = None
+        _LOGGER.debug(f"{self.config.name} - Options applied without reload.")
+        self.hass.async_create_task(self.async_request_refresh())
+
+    @callback
+    def async_command_failed(self, cmd: PendingCommand):
+        """The plug never confirmed a command; stop expecting the change."""
+        if cmd.target == "on":
+            self._state = self._state._replace(auto_turning_on=False)
+
+    def _preheat_start(self, inside_schedule: bool, next_transition: datetime | None) -> float | None:
+        """When to switch on ahead of the next window, if preheat applies."""
+        if not self.config.preheat or inside_schedule or next_transition is None:
+            return None
+        start = next_transition.timestamp()
+        lead = self.preheat.lead_time(start)
+        return start - lead if lead > 0 else None
+
+    def _schedule_next(self, now: float, next_transition: datetime | None, preheat_at: float | None = None):
+        """Hand the earliest pending deadline to the shared scheduler."""
+        deadlines = []
+        if next_transition:
+            deadlines.append(next_transition.timestamp())
+        if preheat_at is not None and preheat_at > now:
+            deadlines.append(preheat_at)
+        if self._eco_pause_until is not None:
+            deadlines.append(self._eco_pause_until)
+        # Confirma uma descida pendente mesmo sem novas leituras
+        pending_until = self.duty.pending_until()
+        if pending_until is not None:
+            deadlines.append(pending_until)
+        # Reavalia quando o filtro de potência assenta na última leitura
+        settles_at = self.power_stats.settles_at()
+        if settles_at is not None and settles_at > now:
+            deadlines.append(settles_at)
+        # O tempo de aquecimento de hoje recomeça à meia-noite local
+        deadlines.append(self.energy.next_day(now))
+        for deadline in (
+            next_deadline(self._params, self._state, now),
+            self.load_manager.next_deadline(self, now),
+        ):
+            if deadline is not None:
+                deadlines.append(deadline)
+
+        if not deadlines:
+            self.scheduler.async_cancel(self)
+            return
+        next_at = dt_util.utc_from_timestamp(min(deadlines))
+        self.scheduler.async_schedule(self, next_at)
+        _LOGGER.debug(f"{self.config.name} - Next evaluation scheduled for {next_at}.")
 
     async def _async_update_data(self):
+        started = time.perf_counter()
         try:
             state_switch = self.hass.states.get(self.config.switch_entity)
             state_power = self.hass.states.get(self.config.power_sensor)
@@ -44,145 +275,132 @@ class TowelWarmerCoordinator(DataUpdateCoordinator):
             if state_power.state in ("unavailable", "unknown"):
                 raise UpdateFailed("Power sensor is unavailable")
 
-            auto_switch_id = f"switch.{slugify(f'{self.config.name}_control')}"
-            state_auto = self.hass.states.get(auto_switch_id)
-            auto_enabled = state_auto and state_auto.state == "on"
-            _LOGGER.debug(f"{self.config.name} - Found auto switch entity: {auto_switch_id} with state: {state_auto.state if state_auto else 'Not found'}")
+            auto_enabled = self.auto_enabled
 
-            is_on = state_switch.state == "on"
             power = float(state_power.state)
 
             now_local = dt_util.now()
-            now = now_local.time()
+            now = now_local.timestamp()
+            if not self.power_stats.count:
+                self.power_stats.add(state_power.last_updated.timestamp(), power)
+                self.energy.add(now, power)
+            # Mediana pesada pelo tempo, ignora picos curtos do sensor
+            filtered_power = self.power_stats.filtered_at(now)
+            inside_schedule = self.config.schedule.is_inside(now_local)
+            self.energy.set_inside(now, inside_schedule)
+            next_transition = self.config.schedule.next_transition(now_local)
+            # Com preaquecimento, a janela começa mais cedo para o controlo
+            preheat_at = self._preheat_start(inside_schedule, next_transition)
+            preheating = preheat_at is not None and now >= preheat_at
 
-            if isinstance(self.config.start_time, str):
-                start = datetime.strptime(self.config.start_time, "%H:%M:%S").time()
-            else:
-                start = self.config.start_time
+            if self._state.last_switch_state == "on":
+                self._handle_duty_edge(self.duty.confirm(now))
+            eco_paused = self._eco_paused(now, inside_schedule or preheating, bool(auto_enabled))
 
-            if isinstance(self.config.end_time, str):
-                end = datetime.strptime(self.config.end_time, "%H:%M:%S").time()
-            else:
-                end = self.config.end_time
-
-            inside_schedule = start <= now <= end if start < end else now >= start or now <= end
-
-            # Detect manual override via switch state change
-            previous_state = self._last_switch_state
-            self._last_switch_state = state_switch.state
-
-            if previous_state is not None and previous_state != state_switch.state:
-                if state_switch.state == "on" and not self._auto_turning_on:
-                    self._manual_override = True
-                    self._manual_override_since = dt_util.now()
-                    _LOGGER.debug(f"{self.config.name} - Manual override detected: switch turned on manually.")
-                    await self.save_persistent_data()
-                elif state_switch.state == "off":
-                    self._manual_override = False
-                    self._manual_override_since = None
-                    _LOGGER.debug(f"{self.config.name} - Switch turned off. Clearing manual override.")
-                    await self.save_persistent_data()
-
-            # Cancel auto flag
-            self._auto_turning_on = False
-
-            # Desativa manual_override após limite
-            if self._manual_override and self._manual_override_since:
-                elapsed = dt_util.now() - self._manual_override_since
-                if elapsed.total_seconds() > self.config.manual_max_duration * 60:
-                    _LOGGER.info(f"{self.config.name} - Manual override exceeded {self.config.manual_max_duration} minutes. Turning off.")
-                    await self.hass.services.async_call("switch", "turn_off", {"entity_id": self.config.switch_entity}, blocking=True)
-                    self._manual_override = False
-                    self._manual_override_since = None
-                    await self.save_persistent_data()
-                    is_on = False
+            previous = self._state
+            inputs = (now, state_switch.state, filtered_power, inside_schedule or preheating, bool(auto_enabled))
+            self._state, decision = step(
+                self._params, previous, *inputs, self.load_manager.holds_grant(self) and not eco_paused
+            )
+            if decision.waiting and not eco_paused and self.load_manager.async_request(self, now):
+                self._state, decision = step(self._params, previous, *inputs, True)
+
+            actions = decision.actions
+            if decision.is_on and not self._state.manual_override and not actions:
+                if self.load_manager.should_yield(self, now):
+                    actions += (Action.LOAD_SHED,)
+                elif eco_paused:
+                    actions += (Action.ECO_PAUSE,)
+            if previous.manual_override != self._state.manual_override:
+                _LOGGER.debug(f"{self.config.name} - Manual override {'detected' if self._state.manual_override else 'cleared'}.")
+            if decision.is_malfunction:
+                _LOGGER.debug(f"{self.config.name} - Low power for {now - self._state.power_low_since:.0f}s. Marking as malfunction.")
 
             _LOGGER.debug(
-                f"{self.config.name} - Diagnostic state: is_on={is_on}, inside_schedule={inside_schedule}, "
-                f"manual_override={self._manual_override}, auto_enabled={auto_enabled}, power={power:.2f}"
+                f"{self.config.name} - Diagnostic state: is_on={decision.is_on}, inside_schedule={inside_schedule}, "
+                f"manual_override={self._state.manual_override}, auto_enabled={auto_enabled}, power={power:.2f}, filtered_power={filtered_power:.2f}"
             )
 
-            is_malfunction = False
-            if is_on and power < self.config.minimum_power:
-                if not self._power_low_since:
-                    self._power_low_since = dt_util.now()
-                    _LOGGER.debug(f"{self.config.name} - Power dropped below malfunction threshold. Starting timer...")
-                    await self.save_persistent_data()
-            else:
-                if self._power_low_since:
-                    _LOGGER.debug(f"{self.config.name} - Power normal. Clearing malfunction timer.")
-                self._power_low_since = None
-                await self.save_persistent_data()
-
-            if self._power_low_since:
-                elapsed = dt_util.now() - self._power_low_since
-                if elapsed >= timedelta(seconds=60):
-                    is_malfunction = True
-                    _LOGGER.debug(f"{self.config.name} - Low power for {elapsed}. Marking as malfunction.")
-                else:
-                    _LOGGER.debug(f"{self.config.name} - Power low for {elapsed.total_seconds():.0f}s but not long enough.")
-
-            # Automatic control logic
-            if auto_enabled:
-                if inside_schedule and not is_on:
-                    _LOGGER.info(f"{self.config.name} - Inside schedule. Turning on towel warmer...")
-                    self._auto_turning_on = True
-                    await self.hass.services.async_call("switch", "turn_on", {"entity_id": self.config.switch_entity}, blocking=True)
-                    self._last_auto_on = dt_util.now()
-                    self._manual_override = False
-                    self._manual_override_since = None
-                    await self.save_persistent_data()
-                elif not inside_schedule and is_on and not self._manual_override:
-                    _LOGGER.info(f"{self.config.name} - Outside schedule. Turning off towel warmer...")
-                    await self.hass.services.async_call("switch", "turn_off", {"entity_id": self.config.switch_entity}, blocking=True)
-                    self._manual_override = False
-                    self._manual_override_since = None
-                    await self.save_persistent_data()
+            self.load_manager.async_update(
+                self,
+                is_on=decision.is_on and not any(a.service == "turn_off" for a in actions),
+                manual=self._state.manual_override,
+                # Uma pausa eco é curta, o warmer mantém a sua parte do orçamento
+                wants_on=decision.waiting or eco_paused or Action.SCHEDULE_ON in actions,
+                now=now,
+            )
+
+            # Os comandos seguem pela fila do actuator, sem bloquear a atualização
+            for action in actions:
+                if self.actuator.async_command(self, self.config.switch_entity, action.service):
+                    _LOGGER.info(f"{self.config.name} - {ACTION_MESSAGES[action]}")
+                    if action in (Action.SCHEDULE_ON, Action.SCHEDULE_OFF) and self._last_transition is not None and now >= self._last_transition:
+                        self._actuation_boundary = self._last_transition
+                    if action is Action.ECO_PAUSE:
+                        self.duty.add_savings(self.duty.off_time * ECO_IDLE_EXTENSION)
+
+            # O checkpoint de energia só muda após incrementos relevantes
+            self.save_persistent_data()
+
+            self._last_transition = next_transition.timestamp() if next_transition else None
+            self._schedule_next(now, next_transition, preheat_at)
 
             return {
-                "is_on": is_on,
+                "is_on": decision.is_on,
                 "power": power,
                 "inside_schedule": inside_schedule,
-                "manual_override": self._manual_override,
-                "is_malfunction": is_malfunction,
+                "preheating": preheating,
+                "preheat_start": dt_util.utc_from_timestamp(preheat_at) if preheat_at is not None else None,
+                "manual_override": self._state.manual_override,
+                "is_malfunction": decision.is_malfunction,
+                "next_transition": next_transition,
+                "power_stats": self.power_stats.as_dict(now),
+                "duty_cycle": self.duty.as_dict(),
+                **self.energy.values(now),
             }
 
         except Exception as e:
+            self.metrics.failure(str(e) if isinstance(e, UpdateFailed) else type(e).__name__)
             raise UpdateFailed(f"Error updating towel_warmer data: {e}")
+        finally:
+            self.metrics.observe("update_duration", time.perf_counter() - started)
 
     async def load_persistent_data(self):
+        """Restore control and energy state; must run before the first refresh."""
         data = await self.storage.async_load()
         if not data:
             _LOGGER.debug("%s - No persistent data found; starting fresh.", self.config.name)
             return
 
-        self._last_auto_on = _safe_parse_dt(data.get("last_auto_on"))
-        self._power_low_since = _safe_parse_dt(data.get("power_low_since"))
-        self._manual_override = bool(data.get("manual_override", False))
-        self._manual_override_since = _safe_parse_dt(data.get("manual_override_since"))
-        self._last_switch_state = data.get("last_switch_state", None)
-
-        _LOGGER.debug(
-            "%s - Loaded persistent: last_auto_on=%s, power_low_since=%s, "
-            "manual_override=%s, manual_override_since=%s, last_switch_state=%s",
-            self.config.name,
-            self._last_auto_on,
-            self._power_low_since,
-            self._manual_override,
-            self._manual_override_since,
-            self._last_switch_state,
+        self._state = ControlState(
+            last_auto_on=_timestamp(data.get("last_auto_on")),
+            power_low_since=_timestamp(data.get("power_low_since")),
+            manual_override=bool(data.get("manual_override", False)),
+            manual_override_since=_timestamp(data.get("manual_override_since")),
         )
+        self.energy.restore(data.get("energy"))
+        self.load_manager.restore_draw(self, data.get("typical_draw"))
+        self.preheat.restore(data.get("preheat"))
+        self.duty.restore(data.get("duty_cycle"))
 
-    async def save_persistent_data(self):
-        try:
-            await self.storage.async_save({
-                "last_auto_on": self._last_auto_on.isoformat() if self._last_auto_on else None,
-                "power_low_since": self._power_low_since.isoformat() if self._power_low_since else None,
-                "manual_override": self._manual_override,
-                "manual_override_since": self._manual_override_since.isoformat() if self._manual_override_since else None,
-                "last_switch_state": self._last_switch_state,
-                "is_full_latched": getattr(self, "_is_full_latched", None),  # só no dehumidifier_plug
-            })
-        except Exception as err:
-            _LOGGER.warning("%s - Failed to save persistent data: %s", self.config.name, err)
+        _LOGGER.debug("%s - Loaded persistent: %s", self.config.name, self._state)
 
+    def save_persistent_data(self, force_energy: bool = False):
+        """Schedule a debounced write; no-op when nothing changed."""
+        state = self._state
+        if force_energy:
+            self.energy.close(dt_util.utcnow().timestamp())
+        changed = self.storage.async_schedule_save({
+            "last_auto_on": _isoformat_ts(state.last_auto_on),
+            "power_low_since": _isoformat_ts(state.power_low_since),
+            "manual_override": state.manual_override,
+            "manual_override_since": _isoformat_ts(state.manual_override_since),
+            "is_full_latched": None,  # só no dehumidifier_plug
+            "energy": self.energy.checkpoint(force=force_energy),
+            # Arredondado aos 10 W para não reescrever a store a cada leitura
+            "typical_draw": int(round(self.load_manager.learned_draw(self) or 0, -1)) or None,
+            "preheat": self.preheat.as_dict(),
+            "duty_cycle": self.duty.checkpoint(),
+        })
+        if changed:
+            self.metrics.count("store_writes")
@@ -0,0 +1,49 @@
+from typing import Any
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, DATA_STORE
+from .utils import _isoformat_ts
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    """Return diagnostics for a towel warmer config entry."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+    now = dt_util.utcnow().timestamp()
+    state = coordinator._state
+    pending = coordinator.actuator.pending(coordinator.config.switch_entity)
+    next_deadline = coordinator.scheduler.next_deadline(coordinator)
+
+    return {
+        "entry": {
+            "title": entry.title,
+            "data": dict(entry.data),
+            "options": dict(entry.options),
+        },
+        "control_state": {
+            "last_auto_on": _isoformat_ts(state.last_auto_on),
+            "power_low_since": _isoformat_ts(state.power_low_since),
+            "manual_override": state.manual_override,
+            "manual_override_since": _isoformat_ts(state.manual_override_since),
+            "last_switch_state": state.last_switch_state,
+            "auto_turning_on": state.auto_turning_on,
+        },
+        "last_update_success": coordinator.last_update_success,
+        "data": coordinator.data,
+        "next_evaluation": next_deadline.isoformat() if next_deadline else None,
+        "pending_command": {
+            "service": pending.service,
+            "target": pending.target,
+            "attempts": pending.attempts,
+            "context_id": pending.context.id if pending.context else None,
+        } if pending else None,
+        "load_manager": {
+            "budget": coordinator.load_manager.budget,
+            "used": coordinator.load_manager.used(),
+            "holds_grant": coordinator.load_manager.holds_grant(coordinator),
+            "learned_draw": coordinator.load_manager.learned_draw(coordinator),
+        },
+        "power_stats": coordinator.power_stats.as_dict(now),
+        "metrics": coordinator.metrics.as_dict(),
+        "store_writes_total": hass.data[DOMAIN][DATA_STORE].writes,
+    }
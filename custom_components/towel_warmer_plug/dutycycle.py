@@ -0,0 +1,147 @@
+"""Online detection of thermostat duty cycling.
+
+Once warm, a towel warmer with its own thermostat alternates between
+heating phases (full power) and idle phases (near zero) while the plug stays
+on. A crossing of the minimum power only becomes an edge once the new level
+has held for MIN_PHASE, so sensor dips never end a phase. Phase lengths and
+heating power are kept as running averages, so each warmer needs a fixed
+handful of numbers regardless of how long it runs.
+"""
+from typing import Any, Optional
+
+_KWH = 3_600_000.0  # joules per kWh
+
+LEARNING_RATE = 0.3
+MIN_PHASE = 20.0  # seconds; fases mais curtas são ruído do sensor
+MIN_CYCLES = 3
+# Fora mais tempo do que isto, o warmer arrefeceu e o ciclo recomeça do zero
+COLD_RESET = 1800.0  # seconds
+
+RISE = "rise"
+FALL = "fall"
+
+class DutyCycleDetector:
+    """Streaming edge detector and duty ratio of one warmer's thermostat."""
+
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+        self.on_time: Optional[float] = None  # average heating phase, seconds
+        self.off_time: Optional[float] = None  # average idle phase, seconds
+        self.on_power: Optional[float] = None  # average power while heating, W
+        self.cycles = 0  # ciclos completos seguidos desde o último arranque a frio
+        self.savings_kwh = 0.0
+        self._high: Optional[bool] = None
+        self._edge_ts: Optional[float] = None
+        self._pending_ts: Optional[float] = None  # cruzamento ainda por confirmar
+        self._idle_seen = False  # a fase de aquecimento inicial não é um ciclo
+        self._off_since: Optional[float] = None
+
+    @property
+    def cycling(self) -> bool:
+        return self.cycles >= MIN_CYCLES and self.on_time is not None and self.off_time is not None
+
+    @property
+    def duty_ratio(self) -> Optional[float]:
+        if self.on_time is None or self.off_time is None:
+            return None
+        return self.on_time / (self.on_time + self.off_time)
+
+    @property
+    def phase_start(self) -> Optional[float]:
+        """When the current confirmed phase began."""
+        return self._edge_ts
+
+    def pending_until(self) -> Optional[float]:
+        """When a pending crossing becomes an edge if the level holds."""
+        if self._pending_ts is None:
+            return None
+        return self._pending_ts + MIN_PHASE
+
+    @staticmethod
+    def _average(current: Optional[float], value: float) -> float:
+        return value if current is None else current + (value - current) * LEARNING_RATE
+
+    def switched(self, ts: float, on: bool):
+        """The plug changed state; edges across it are not thermostat edges."""
+        if on:
+            if self._off_since is not None and ts - self._off_since > COLD_RESET:
+                self.cycles = 0
+            self._off_since = None
+        else:
+            self._off_since = ts
+        self._high = None
+        self._edge_ts = None
+        self._pending_ts = None
+        self._idle_seen = False
+
+    def add(self, ts: float, power: float) -> Optional[str]:
+        """Feed a power sample taken while the plug is on; returns RISE, FALL or None."""
+        high = power >= self.threshold
+        if high:
+            self.on_power = self._average(self.on_power, power)
+        if self._high is None:
+            self._high, self._edge_ts = high, ts
+            return None
+        if high == self._high:
+            # Voltou ao nível anterior antes de MIN_PHASE: era ruído
+            self._pending_ts = None
+            return None
+        if self._pending_ts is None:
+            self._pending_ts = ts
+        return self.confirm(ts)
+
+    def confirm(self, now: float) -> Optional[str]:
+        """Turn a pending crossing into an edge once it has held for MIN_PHASE."""
+        if self._pending_ts is None or now - self._pending_ts < MIN_PHASE:
+            return None
+        high = not self._high
+        duration = self._pending_ts - self._edge_ts
+        if duration >= MIN_PHASE:
+            if high:
+                # Fim de uma fase de repouso do termóstato
+                self.off_time = self._average(self.off_time, duration)
+                self._idle_seen = True
+                self.cycles += 1
+            elif self._idle_seen:
+                self.on_time = self._average(self.on_time, duration)
+        self._high, self._edge_ts, self._pending_ts = high, self._pending_ts, None
+        return RISE if high else FALL
+
+    def pause_length(self, extension: float) -> Optional[float]:
+        """Idle time to enforce for a pause stretching the idle phase by extension."""
+        if not self.cycling:
+            return None
+        return self.off_time * (1 + extension)
+
+    def add_savings(self, seconds: float):
+        """Count heating avoided by keeping the plug off for extra seconds."""
+        if self.on_power is None or self.duty_ratio is None:
+            return
+        self.savings_kwh += seconds * self.duty_ratio * self.on_power / _KWH
+
+    def as_dict(self) -> dict[str, Any]:
+        duty = self.duty_ratio
+        return {
+            "cycling": self.cycling,
+            "duty_ratio": round(duty, 3) if duty is not None else None,
+            "heating_phase": round(self.on_time) if self.on_time is not None else None,
+            "idle_phase": round(self.off_time) if self.off_time is not None else None,
+            "eco_savings": round(self.savings_kwh, 3),
+        }
+
+    def checkpoint(self) -> dict[str, Any]:
+        """Learned profile for storage, rounded so it changes rarely."""
+        return {
+            "on_time": round(self.on_time, -1) if self.on_time is not None else None,
+            "off_time": round(self.off_time, -1) if self.off_time is not None else None,
+            "on_power": round(self.on_power) if self.on_power is not None else None,
+            "savings_kwh": round(self.savings_kwh, 2),
+        }
+
+    def restore(self, data: Optional[dict[str, Any]]):
+        if not data:
+            return
+        self.on_time = data.get("on_time")
+        self.off_time = data.get("off_time")
+        self.on_power = data.get("on_power")
+        self.savings_kwh = float(data.get("savings_kwh") or 0.0)
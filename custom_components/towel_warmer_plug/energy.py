@@ -0,0 +1,134 @@
+"""Incremental energy and heating-time accounting.
+
+A plug reports power on change and holds each reading until the next one,
+so each power sample closes the segment since the previous sample at the
+previous reading. The still-open segment is valued the same way, so totals
+never go backwards when power drops. The cost per state change is O(1) and
+no recorder queries or separate integration helpers are needed; the start of
+the local day is supplied by the caller.
+"""
+from typing import Any, Callable, Optional
+
+_KWH = 3_600_000.0  # joules per kWh
+
+class EnergyMeter:
+    """Running energy (kWh), heating time today and energy per window."""
+
+    def __init__(self, threshold: float, day_start: Callable[[float], float], checkpoint_kwh: float = 0.01):
+        self.threshold = threshold
+        self._day_start = day_start
+        self._checkpoint_kwh = checkpoint_kwh
+        self.total_kwh = 0.0
+        self.window_kwh = 0.0
+        self.heating_today = 0.0  # seconds
+        self.day = None  # início do dia local (timestamp) a que heating_today se refere
+        self._day_end = None
+        self._inside = False
+        self._last_ts: Optional[float] = None
+        self._last_power: Optional[float] = None
+        self._checkpoint: Optional[dict[str, Any]] = None
+
+    def _roll_day(self, ts: float):
+        if self._day_end is not None and ts < self._day_end:
+            return
+        day = self._day_start(ts)
+        if day != self.day:
+            self.day = day
+            self.heating_today = 0.0
+        # Dias locais têm entre 23 e 25 horas; +26h cai sempre no dia seguinte
+        self._day_end = self._day_start(day + 26 * 3600)
+
+    def next_day(self, ts: float) -> float:
+        """Start of the local day after the one containing ts."""
+        self._roll_day(ts)
+        return self._day_end
+
+    def _segment(self, ts: float) -> tuple[float, float]:
+        """Energy (kWh) and heating seconds today between the last sample and ts."""
+        self._roll_day(ts)
+        if self._last_ts is None or ts <= self._last_ts:
+            return 0.0, 0.0
+        energy = self._last_power * (ts - self._last_ts) / _KWH
+        heating = 0.0
+        if self._last_power >= self.threshold:
+            # Só conta a parte do segmento que pertence ao dia de hoje
+            heating = max(0.0, ts - max(self._last_ts, self.day))
+        return energy, heating
+
+    def add(self, ts: float, power: float):
+        """Close the segment up to a new power sample."""
+        if self._last_ts is not None and ts < self._last_ts:
+            return
+        energy, heating = self._segment(ts)
+        self.total_kwh += energy
+        if self._inside:
+            self.window_kwh += energy
+        self.heating_today += heating
+        self._last_ts, self._last_power = ts, power
+
+    def close(self, ts: float):
+        """Account the open segment up to ts, e.g. before a final checkpoint."""
+        if self._last_power is not None:
+            self.add(ts, self._last_power)
+
+    def set_inside(self, ts: float, inside: bool):
+        """Track schedule windows; window energy restarts when one opens."""
+        if inside and not self._inside:
+            self.close(ts)
+            self.window_kwh = 0.0
+        elif self._inside and not inside:
+            self.close(ts)
+        self._inside = inside
+
+    def values(self, now: float) -> dict[str, float]:
+        """Totals including the still-open segment, held at the last power."""
+        energy, heating = (0.0, 0.0)
+        if self._last_power is not None:
+            energy, heating = self._segment(now)
+        else:
+            self._roll_day(now)
+        return {
+            "energy": round(self.total_kwh + energy, 4),
+            "heating_time_today": round((self.heating_today + heating) / 60, 1),
+            "window_energy": round(self.window_kwh + (energy if self._inside else 0.0), 4),
+        }
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "total_kwh": self.total_kwh,
+            "window_kwh": self.window_kwh,
+            "heating_today": self.heating_today,
+            "day": self.day,
+            "inside": self._inside,
+        }
+
+    def checkpoint(self, force: bool = False) -> Optional[dict[str, Any]]:
+        """Snapshot for storage, refreshed only after a meaningful change.
+
+        Keeps persisted data stable between small increments so the
+        debounced store is not rewritten on every power sample.
+        """
+        current = self.as_dict()
+        previous = self._checkpoint
+        if (
+            force
+            or previous is None
+            or previous["day"] != current["day"]
+            or previous.get("inside") != current["inside"]
+            or abs(current["total_kwh"] - previous["total_kwh"]) >= self._checkpoint_kwh
+            or current["window_kwh"] < previous["window_kwh"]
+        ):
+            self._checkpoint = current
+        return self._checkpoint
+
+    def restore(self, data: Optional[dict[str, Any]]):
+        if not data:
+            return
+        self.total_kwh = float(data.get("total_kwh") or 0.0)
+        self.window_kwh = float(data.get("window_kwh") or 0.0)
+        self.heating_today = float(data.get("heating_today") or 0.0)
+        self.day = data.get("day")
+        # Um reinício a meio da janela não a reabre nem zera a energia dela
+        self._inside = bool(data.get("inside"))
+        self._day_end = None
+        self._checkpoint = self.as_dict()
@@ -0,0 +1,171 @@
+from heapq import heappop, heappush
+from itertools import count
+from typing import TYPE_CHECKING, Optional
+from homeassistant.core import HomeAssistant, callback
+import logging
+
+if TYPE_CHECKING:
+    from .coordinator import TowelWarmerCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+# Peso de cada nova leitura no consumo típico aprendido
+DRAW_LEARNING_RATE = 0.1
+
+class TowelWarmerLoadManager:
+    """Domain-wide power budget for automatic turn-ons.
+
+    Warmers ask for a grant before switching on. A grant is given when the
+    expected draw of everything already on plus the new warmer fits in the
+    budget, and no other grant was given in the last stagger seconds. Warmers
+    that cannot start wait in a priority queue ordered by when they were last
+    served, so the least recently served starts first. While others wait, the
+    warmer that has held its grant the longest is asked to yield once it has
+    had a full rotation period.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        budget: float,
+        stagger: float,
+        rotation: float,
+        default_draw: float,
+    ):
+        self.hass = hass
+        self.budget = budget  # W, 0 = sem limite
+        self.stagger = stagger
+        self.rotation = rotation
+        self.default_draw = default_draw
+        self._draw: dict["TowelWarmerCoordinator", float] = {}
+        self._granted: dict["TowelWarmerCoordinator", float] = {}  # warmer -> início da concessão
+        self._manual: set["TowelWarmerCoordinator"] = set()
+        self._served: dict["TowelWarmerCoordinator", float] = {}
+        self._queue: list[tuple[float, int, "TowelWarmerCoordinator"]] = []
+        self._waiting: dict["TowelWarmerCoordinator", int] = {}  # warmer -> entrada válida na fila
+        self._seq = count()
+        self._last_grant: Optional[float] = None
+
+    def expected_draw(self, coordinator: "TowelWarmerCoordinator") -> float:
+        return self._draw.get(coordinator, self.default_draw)
+
+    @callback
+    def observe(self, coordinator: "TowelWarmerCoordinator", power: float):
+        """Learn a warmer's typical draw from readings while it heats."""
+        if power < coordinator.config.minimum_power:
+            return
+        draw = self._draw.get(coordinator)
+        self._draw[coordinator] = power if draw is None else draw + (power - draw) * DRAW_LEARNING_RATE
+
+    def learned_draw(self, coordinator: "TowelWarmerCoordinator") -> Optional[float]:
+        return self._draw.get(coordinator)
+
+    @callback
+    def restore_draw(self, coordinator: "TowelWarmerCoordinator", draw: Optional[float]):
+        if draw:
+            self._draw.setdefault(coordinator, float(draw))
+
+    def used(self) -> float:
+        return sum(self.expected_draw(c) for c in self._granted.keys() | self._manual)
+
+    def holds_grant(self, coordinator: "TowelWarmerCoordinator") -> bool:
+        return not self.budget and not self.stagger or coordinator in self._granted
+
+    def _fits(self, coordinator: "TowelWarmerCoordinator") -> bool:
+        return not self.budget or self.used() + self.expected_draw(coordinator) <= self.budget
+
+    def _stagger_until(self, now: float) -> Optional[float]:
+        if self._last_grant is not None and now < self._last_grant + self.stagger:
+            return self._last_grant + self.stagger
+        return None
+
+    def _grant(self, coordinator: "TowelWarmerCoordinator", now: float):
+        self._granted[coordinator] = now
+        self._served[coordinator] = now
+        self._last_grant = now
+        self._waiting.pop(coordinator, None)
+
+    @callback
+    def async_request(self, coordinator: "TowelWarmerCoordinator", now: float) -> bool:
+        """Ask to switch a warmer on now; queue it when not possible."""
+        if coordinator in self._granted:
+            return True
+        if not self._waiting and self._stagger_until(now) is None and self._fits(coordinator):
+            self._grant(coordinator, now)
+            return True
+        if coordinator not in self._waiting:
+            seq = next(self._seq)
+            self._waiting[coordinator] = seq
+            heappush(self._queue, (self._served.get(coordinator, 0.0), seq, coordinator))
+            _LOGGER.debug(
+                "%s - Turn-on deferred by load manager (%.0f W of %.0f W in use).",
+                coordinator.config.name, self.used(), self.budget,
+            )
+            # O warmer há mais tempo ligado passa a ter um prazo de rotação
+            oldest = self._oldest_grant()
+            if oldest is not None:
+                self.hass.async_create_task(oldest.async_request_refresh())
+        self._admit(now)
+        return coordinator in self._granted
+
+    @callback
+    def async_update(self, coordinator: "TowelWarmerCoordinator", is_on: bool, manual: bool, wants_on: bool, now: float):
+        """Report the warmer's state after an evaluation.
+
+        Warmers switched on manually count against the budget without a grant.
+        A warmer that is off and not about to turn on frees its share.
+        """
+        if is_on and manual:
+            self._manual.add(coordinator)
+        else:
+            self._manual.discard(coordinator)
+        if is_on and not manual:
+            self._granted.setdefault(coordinator, now)
+        elif not wants_on:
+            self._granted.pop(coordinator, None)
+            self._waiting.pop(coordinator, None)
+        self._admit(now)
+
+    @callback
+    def async_remove(self, coordinator: "TowelWarmerCoordinator", now: float):
+        self._granted.pop(coordinator, None)
+        self._manual.discard(coordinator)
+        self._waiting.pop(coordinator, None)
+        self._served.pop(coordinator, None)
+        self._draw.pop(coordinator, None)
+        self._admit(now)
+
+    def _oldest_grant(self) -> Optional["TowelWarmerCoordinator"]:
+        if not self._granted:
+            return None
+        return min(self._granted.items(), key=lambda item: item[1])[0]
+
+    def should_yield(self, coordinator: "TowelWarmerCoordinator", now: float) -> bool:
+        """True when this warmer should switch off so a waiting one can start."""
+        if not self.budget or not self._waiting or coordinator not in self._granted:
+            return False
+        if now - self._granted[coordinator] < self.rotation:
+            return False
+        return self._oldest_grant() is coordinator
+
+    def next_deadline(self, coordinator: "TowelWarmerCoordinator", now: float) -> Optional[float]:
+        """When the manager needs this warmer evaluated again, if ever."""
+        if coordinator in self._waiting:
+            return self._stagger_until(now)
+        if self.budget and self._waiting and self._oldest_grant() is coordinator:
+            return self._granted[coordinator] + self.rotation
+        return None
+
+    def _admit(self, now: float):
+        """Grant waiting warmers in priority order while the budget allows."""
+        while self._queue:
+            _, seq, coordinator = self._queue[0]
+            if self._waiting.get(coordinator) != seq:
+                heappop(self._queue)
+                continue
+            if self._stagger_until(now) is not None or not self._fits(coordinator):
+                return
+            heappop(self._queue)
+            self._grant(coordinator, now)
+            _LOGGER.debug("%s - Load manager granted turn-on.", coordinator.config.name)
+            self.hass.async_create_task(coordinator.async_request_refresh())
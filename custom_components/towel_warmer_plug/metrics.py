@@ -0,0 +1,94 @@
+"""Per-warmer counters and latency histograms.
+
+Histograms use fixed bucket bounds, so recording a value is a binary search
+and an increment, and memory does not grow with the number of samples.
+"""
+from bisect import bisect_left
+from collections import Counter
+from typing import Any, Optional
+
+# Limites superiores dos buckets, em milissegundos
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+class Histogram:
+    __slots__ = ("counts", "count", "total", "max", "last")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last: Optional[float] = None
+
+    def observe(self, ms: float):
+        self.counts[bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        self.last = ms
+        if ms > self.max:
+            self.max = ms
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if n and seen >= rank:
+                return float(BUCKETS_MS[i]) if i < len(BUCKETS_MS) else self.max
+        return self.max
+
+    def as_dict(self) -> dict[str, Any]:
+        buckets = {f"le_{bound}": n for bound, n in zip(BUCKETS_MS, self.counts)}
+        buckets["inf"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "last": round(self.last, 2) if self.last is not None else None,
+            "mean": round(self.total / self.count, 2) if self.count else None,
+            "max": round(self.max, 2),
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "buckets": buckets,
+        }
+
+class WarmerMetrics:
+    """Counters, failures by cause and histograms of one warmer.
+
+    When disabled every call returns immediately.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.counters: Counter = Counter()
+        self.failures: Counter = Counter()
+        self.histograms: dict[str, Histogram] = {}
+
+    def count(self, name: str, n: int = 1):
+        if self.enabled:
+            self.counters[name] += n
+
+    def failure(self, cause: str):
+        if self.enabled:
+            self.failures[cause] += 1
+
+    def observe(self, name: str, seconds: float):
+        if not self.enabled:
+            return
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        histogram.observe(seconds * 1000)
+
+    def last(self, name: str) -> Optional[float]:
+        histogram = self.histograms.get(name)
+        return round(histogram.last, 2) if histogram and histogram.last is not None else None
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "counters": dict(self.counters),
+            "failures": dict(self.failures),
+            "histograms_ms": {name: h.as_dict() for name, h in self.histograms.items()},
+        }
@@ -8,9 +8,17 @@ from .const import (
     CONF_POWER,
     CONF_START_TIME,
     CONF_END_TIME,
+    CONF_WEEKLY_SCHEDULE,
     CONF_MINIMUM_POWER,
     DEFAULT_MINIMUM_POWER,
+    CONF_MALFUNCTION_WINDOW,
+    DEFAULT_MALFUNCTION_WINDOW,
+    CONF_PREHEAT,
+    DEFAULT_PREHEAT,
+    CONF_ECO_MODE,
+    DEFAULT_ECO_MODE,
 )
+from .schedule import TowelWarmerSchedule, parse_time
 
 CONF_MANUAL_MAX_DURATION = "manual_max_duration"
 DEFAULT_MANUAL_MAX_DURATION = 60  # minutos
@@ -24,16 +32,30 @@ class TowelWarmerConfig:
     start_time: time
     end_time: time
     manual_max_duration: int  # em minutos
+    schedule: TowelWarmerSchedule
+    malfunction_window: int  # em segundos
+    preheat: bool = DEFAULT_PREHEAT
+    eco_mode: bool = DEFAULT_ECO_MODE
 
     @staticmethod
     def from_dict(data: dict[str, Any]) -> "TowelWarmerConfig":
+        # O horário semanal, se existir, substitui a janela diária única
+        weekly = (data.get(CONF_WEEKLY_SCHEDULE) or "").strip()
+        if weekly:
+            schedule = TowelWarmerSchedule.from_spec(weekly)
+        else:
+            schedule = TowelWarmerSchedule.from_times(data[CONF_START_TIME], data[CONF_END_TIME])
         return TowelWarmerConfig(
             name=data[CONF_NAME],
             switch_entity=data[CONF_SWITCH],
             power_sensor=data[CONF_POWER],
             minimum_power=data.get(CONF_MINIMUM_POWER, DEFAULT_MINIMUM_POWER),
-            start_time=data[CONF_START_TIME],
-            end_time=data[CONF_END_TIME],
+            start_time=parse_time(data[CONF_START_TIME]),
+            end_time=parse_time(data[CONF_END_TIME]),
             manual_max_duration=data.get(CONF_MANUAL_MAX_DURATION, DEFAULT_MANUAL_MAX_DURATION),
+            schedule=schedule,
+            malfunction_window=data.get(CONF_MALFUNCTION_WINDOW, DEFAULT_MALFUNCTION_WINDOW),
+            preheat=bool(data.get(CONF_PREHEAT, DEFAULT_PREHEAT)),
+            eco_mode=bool(data.get(CONF_ECO_MODE, DEFAULT_ECO_MODE)),
         )
 
@@ -0,0 +1,81 @@
+"""Heat-up time model for predictive preheat.
+
+A warmer switched on from cold draws full power until its thermostat first
+opens, at which point the power drops below the minimum power. The length of
+that first continuous heating run is the time it needed to reach
+temperature. After being off for t seconds a warmer has lost a fraction
+1 - exp(-t / tau) of its heat, so a run is scaled by that fraction into an
+estimate of the full cold-start time, which is averaged over runs.
+"""
+from math import exp
+from typing import Any, Optional
+
+COOLING_TAU = 7200.0  # seconds
+MAX_LEAD = 7200.0  # seconds
+LEARNING_RATE = 0.2
+# Arranques quase a quente dizem pouco sobre o tempo total de aquecimento
+MIN_COLD_FRACTION = 0.3
+
+class HeatUpModel:
+    """Learned cold-start heat-up time of one warmer."""
+
+    def __init__(self, threshold: float, cooling_tau: float = COOLING_TAU, max_lead: float = MAX_LEAD):
+        self.threshold = threshold
+        self.cooling_tau = cooling_tau
+        self.max_lead = max_lead
+        self.heat_up: Optional[float] = None  # seconds from fully cold
+        self.samples = 0
+        self._off_since: Optional[float] = None
+        self._run_fraction: Optional[float] = None  # arrefecimento no arranque em curso
+        self._heating_since: Optional[float] = None
+
+    def cold_fraction(self, ts: float) -> float:
+        """Fraction of a cold start needed at ts; unknown counts as cold."""
+        if self._off_since is None:
+            return 1.0
+        return 1 - exp(-max(0.0, ts - self._off_since) / self.cooling_tau)
+
+    def switched(self, ts: float, on: bool):
+        if on:
+            self._run_fraction = self.cold_fraction(ts)
+        else:
+            self._off_since = ts
+            self._run_fraction = None
+        self._heating_since = None
+
+    def add(self, ts: float, power: float):
+        """Feed a power sample; the first drop after heating ends the run."""
+        if self._run_fraction is None:
+            return
+        if power >= self.threshold:
+            if self._heating_since is None:
+                self._heating_since = ts
+        elif self._heating_since is not None:
+            self._learn(ts - self._heating_since, self._run_fraction)
+            # Uma medição por arranque, os ciclos seguintes são do termóstato
+            self._run_fraction = None
+
+    def _learn(self, duration: float, fraction: float):
+        if fraction < MIN_COLD_FRACTION or duration <= 0:
+            return
+        estimate = min(duration / fraction, self.max_lead)
+        self.heat_up = estimate if self.heat_up is None else self.heat_up + (estimate - self.heat_up) * LEARNING_RATE
+        self.samples += 1
+
+    def lead_time(self, at: float) -> float:
+        """Seconds of preheat needed to be warm at the given time."""
+        if self.heat_up is None:
+            return 0.0
+        return min(self.heat_up * self.cold_fraction(at), self.max_lead)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "heat_up": round(self.heat_up, 1) if self.heat_up is not None else None,
+            "samples": self.samples,
+        }
+
+    def restore(self, data: Optional[dict[str, Any]]):
+        if not data or data.get("heat_up") is None:
+            return
+        self.heat_up = float(data["heat_up"])
+        self.samples = int(data.get("samples") or 0)
@@ -0,0 +1,334 @@
+"""Offline replay of recorded history through the control state machine.
+
+Reads recorder history exported from Home Assistant for a warmer's switch and
+power sensor and reports what the integration would have done with a given
+minimum_power and manual_max_duration. sweep_minimum_power() evaluates many
+thresholds in a single pass, for picking minimum_power before rolling options
+out. Pass the warmer's schedule and time zone; without a schedule it is
+treated as always inside its window.
+
+    python -m custom_components.towel_warmer_plug.replay history.csv \\
+        --switch switch.bathroom_plug --power sensor.bathroom_plug_power \\
+        --minimum-power 10 --sweep 2,5,10,15,20 \\
+        --start 06:30 --end 08:00 --time-zone Europe/Lisbon
+"""
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Iterable, Optional
+import argparse
+import csv
+import json
+
+from homeassistant.util import dt as dt_util
+
+from .control import Action, ControlParams, ControlState, step, next_deadline
+from .const import (
+    DEFAULT_MINIMUM_POWER, DEFAULT_MANUAL_MAX_DURATION, DEFAULT_MALFUNCTION_WINDOW,
+    POWER_BUFFER_SIZE, POWER_FILTER_WINDOW,
+)
+from .schedule import TowelWarmerSchedule
+from .stats import PowerStats
+
+_UNAVAILABLE = ("unavailable", "unknown", "")
+
+@dataclass
+class ReplayReport:
+    malfunctions: list[tuple[float, float]] = field(default_factory=list)  # (low since, flagged at)
+    actions: list[tuple[float, Action]] = field(default_factory=list)
+    manual_overrides: list[float] = field(default_factory=list)
+    evaluations: int = 0
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "evaluations": self.evaluations,
+            "malfunctions": len(self.malfunctions),
+            "manual_overrides": len(self.manual_overrides),
+            "override_expiries": sum(1 for _, a in self.actions if a is Action.OVERRIDE_EXPIRED),
+            "turn_on": sum(1 for _, a in self.actions if a is Action.SCHEDULE_ON),
+            "turn_off": sum(1 for _, a in self.actions if a is Action.SCHEDULE_OFF),
+        }
+
+def _parse_ts(value: Any) -> float:
+    if isinstance(value, (int, float)):
+        return float(value)
+    parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+def _rows_from_json(data: Any) -> Iterable[dict[str, Any]]:
+    # /api/history/period devolve uma lista por entidade; aceita também uma lista plana
+    if isinstance(data, dict):
+        for entity_id, rows in data.items():
+            for row in rows:
+                yield {"entity_id": entity_id, **row}
+        return
+    for item in data:
+        if isinstance(item, list):
+            entity_id = item[0].get("entity_id") if item else None
+            for row in item:
+                yield {"entity_id": entity_id, **row}
+        else:
+            yield item
+
+def load_history(path: str) -> dict[str, list[tuple[float, str]]]:
+    """Load a CSV or JSON history export into {entity_id: [(ts, state), ...]}."""
+    with open(path, encoding="utf-8") as handle:
+        if path.endswith(".json"):
+            rows = list(_rows_from_json(json.load(handle)))
+        else:
+            rows = list(csv.DictReader(handle))
+
+    history: dict[str, list[tuple[float, str]]] = {}
+    last_entity = None
+    for row in rows:
+        entity_id = row.get("entity_id") or last_entity
+        last_entity = entity_id
+        when = row.get("last_changed") or row.get("last_updated") or row.get("lc") or row.get("lu")
+        state = row.get("state", row.get("s"))
+        if entity_id is None or when is None or state is None:
+            continue
+        history.setdefault(entity_id, []).append((_parse_ts(when), str(state)))
+    for samples in history.values():
+        samples.sort()
+    return history
+
+def merge_streams(
+    switch: list[tuple[float, str]], power: list[tuple[float, str]]
+) -> list[tuple[float, str, float]]:
+    """Merge switch and power histories into (ts, switch_state, power) changes.
+
+    Unavailable power readings keep the previous value, as the coordinator
+    skips updates while the sensor is unavailable.
+    """
+    timeline = sorted([(ts, 0, s) for ts, s in switch] + [(ts, 1, s) for ts, s in power])
+    merged: list[tuple[float, str, float]] = []
+    switch_state, value = None, None
+    for ts, kind, raw in timeline:
+        if kind == 0:
+            switch_state = raw
+        elif raw not in _UNAVAILABLE:
+            try:
+                value = float(raw)
+            except ValueError:
+                continue
+        if switch_state is None or value is None:
+            continue
+        if merged and merged[-1][0] == ts:
+            merged[-1] = (ts, switch_state, value)
+        elif not merged or merged[-1][1:] != (switch_state, value):
+            merged.append((ts, switch_state, value))
+    return merged
+
+def filter_samples(
+    samples: list[tuple[float, str, float]], filter_window: float = POWER_FILTER_WINDOW
+) -> list[tuple[float, str, float]]:
+    """Replace raw power with the filtered power the coordinator decides on.
+
+    The filter is read at every change and, like the coordinator's settle
+    deadline, once the last reading has held for the whole filter window.
+    """
+    stats = PowerStats(window=filter_window, threshold=0.0, capacity=POWER_BUFFER_SIZE, filter_window=filter_window)
+    filtered: list[tuple[float, str, float]] = []
+    for i, (ts, switch_state, power) in enumerate(samples):
+        stats.add(ts, power)
+        points = [ts]
+        settles_at = stats.settles_at()
+        if i + 1 < len(samples) and settles_at < samples[i + 1][0]:
+            points.append(settles_at)
+        for at in points:
+            sample = (at, switch_state, stats.filtered_at(at))
+            if filtered and filtered[-1][0] == at:
+                filtered[-1] = sample
+            elif not filtered or filtered[-1][1:] != sample[1:]:
+                filtered.append(sample)
+    # O fim do histórico marca até onde há prazos a avaliar
+    if samples and filtered[-1][0] < samples[-1][0]:
+        filtered.append((samples[-1][0], *filtered[-1][1:]))
+    return filtered
+
+def replay(
+    params: ControlParams,
+    samples: list[tuple[float, str, float]],
+    schedule=None,
+    auto_enabled: bool = True,
+    filter_window: float = POWER_FILTER_WINDOW,
+) -> ReplayReport:
+    """Stream samples through control.step() the way the coordinator would.
+
+    Power goes through the same filter as in the coordinator (filter_samples).
+    Evaluations happen on every change and at control deadlines (override
+    expiry, malfunction) and schedule transitions in between. The replay is
+    open loop: recorded switch states are not altered by the reported actions,
+    and an action is only reported again after the switch state changes.
+    """
+    samples = filter_samples(samples, filter_window)
+    report = ReplayReport()
+    state = ControlState()
+    last_action = None
+    malfunction_reported = False
+
+    def inside(ts: float) -> bool:
+        return True if schedule is None else schedule.is_inside(_local(ts))
+
+    def evaluate(ts: float, switch_state: str, power: float):
+        nonlocal state, last_action, malfunction_reported
+        previous = state
+        state, decision = step(params, state, ts, switch_state, power, inside(ts), auto_enabled)
+        report.evaluations += 1
+        if state.manual_override and state.manual_override_since == ts and not previous.manual_override:
+            report.manual_overrides.append(ts)
+        if switch_state != previous.last_switch_state:
+            last_action = None
+        for action in decision.actions:
+            if action is not last_action:
+                report.actions.append((ts, action))
+                last_action = action
+        if decision.is_malfunction and not malfunction_reported:
+            report.malfunctions.append((state.power_low_since, ts))
+        malfunction_reported = decision.is_malfunction
+
+    for i, (ts, switch_state, power) in enumerate(samples):
+        evaluate(ts, switch_state, power)
+        until = samples[i + 1][0] if i + 1 < len(samples) else ts
+        while True:
+            pending = [d for d in (
+                next_deadline(params, state, ts),
+                _next_transition(schedule, ts),
+            ) if d is not None and d > ts]
+            if not pending or min(pending) >= until:
+                break
+            ts = min(pending)
+            evaluate(ts, switch_state, power)
+    return report
+
+def _local(ts: float) -> datetime:
+    # O horário é em hora local do warmer (o fuso por omissão do HA)
+    return dt_util.as_local(dt_util.utc_from_timestamp(ts))
+
+def _next_transition(schedule, ts: float) -> Optional[float]:
+    if schedule is None:
+        return None
+    transition = schedule.next_transition(_local(ts))
+    return transition.timestamp() if transition else None
+
+def sweep_minimum_power(
+    samples: list[tuple[float, str, float]],
+    thresholds: Iterable[float],
+    malfunction_delay: float = DEFAULT_MALFUNCTION_WINDOW,
+    filter_window: float = POWER_FILTER_WINDOW,
+) -> dict[float, dict[str, float]]:
+    """Malfunction episodes and flagged seconds for many thresholds at once.
+
+    Power is filtered as in replay(), so results match the coordinator.
+
+    Instead of replaying once per threshold, samples taken while the switch is
+    on are activated in ascending power order and merged with active
+    neighbours (union-find). When a threshold is reached, the components are
+    exactly the low-power runs for that threshold, so each threshold's result
+    is read off in O(1). Total cost is O(n log n + k) for n samples and k
+    thresholds.
+    """
+    samples = filter_samples(samples, filter_window)
+    n = len(samples)
+    durations = [
+        (samples[i + 1][0] - samples[i][0]) if i + 1 < n else 0.0
+        for i in range(n)
+    ]
+    on = [s[1] == "on" for s in samples]
+    order = sorted((s[2], i) for i, s in enumerate(samples) if on[i])
+
+    parent = list(range(n))
+    length = durations[:]
+    active = [False] * n
+    episodes = 0
+    flagged = 0.0
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    # Um episódio só é sinalizado se a potência baixa durar mais do que o atraso
+    def excess(d: float) -> float:
+        return d - malfunction_delay if d > malfunction_delay else 0.0
+
+    results: dict[float, dict[str, float]] = {}
+    pointer = 0
+    for threshold in sorted(set(thresholds)):
+        while pointer < len(order) and order[pointer][0] < threshold:
+            i = order[pointer][1]
+            pointer += 1
+            active[i] = True
+            if length[i] > malfunction_delay:
+                episodes += 1
+                flagged += excess(length[i])
+            for j in (i - 1, i + 1):
+                if 0 <= j < n and active[j]:
+                    a, b = find(i), find(j)
+                    if a == b:
+                        continue
+                    for root in (a, b):
+                        if length[root] > malfunction_delay:
+                            episodes -= 1
+                            flagged -= excess(length[root])
+                    parent[b] = a
+                    length[a] += length[b]
+                    episodes += 1 if length[a] > malfunction_delay else 0
+                    flagged += excess(length[a])
+        results[threshold] = {"episodes": episodes, "flagged_seconds": round(flagged, 3)}
+    return results
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description="Replay towel warmer history through the control logic.")
+    parser.add_argument("history", nargs="+", help="CSV or JSON history export(s)")
+    parser.add_argument("--switch", required=True, help="switch entity_id")
+    parser.add_argument("--power", required=True, help="power sensor entity_id")
+    parser.add_argument("--minimum-power", type=float, default=DEFAULT_MINIMUM_POWER)
+    parser.add_argument("--manual-max-duration", type=float, default=DEFAULT_MANUAL_MAX_DURATION, help="minutes")
+    parser.add_argument("--malfunction-window", type=float, default=DEFAULT_MALFUNCTION_WINDOW, help="seconds")
+    parser.add_argument("--sweep", help="comma-separated minimum_power values to evaluate in one pass")
+    parser.add_argument("--start", help="daily window start, HH:MM")
+    parser.add_argument("--end", help="daily window end, HH:MM")
+    parser.add_argument("--weekly-schedule", help='weekly schedule, rules separated by ";", e.g. "mon-fri 06:30-08:00; weekends 08:00-23:00"')
+    parser.add_argument("--time-zone", help="the warmer's time zone, e.g. Europe/Lisbon (required with a schedule)")
+    args = parser.parse_args(argv)
+
+    schedule = None
+    if args.weekly_schedule or args.start or args.end:
+        if args.weekly_schedule and (args.start or args.end):
+            parser.error("use either --weekly-schedule or --start/--end")
+        if not args.weekly_schedule and not (args.start and args.end):
+            parser.error("--start and --end must be given together")
+        if not args.time_zone:
+            parser.error("--time-zone is required with a schedule")
+        try:
+            schedule = (
+                TowelWarmerSchedule.from_spec(args.weekly_schedule)
+                if args.weekly_schedule
+                else TowelWarmerSchedule.from_times(args.start, args.end)
+            )
+        except ValueError as e:
+            parser.error(str(e))
+    if args.time_zone:
+        time_zone = dt_util.get_time_zone(args.time_zone)
+        if time_zone is None:
+            parser.error(f"unknown time zone: {args.time_zone}")
+        dt_util.set_default_time_zone(time_zone)
+
+    history: dict[str, list[tuple[float, str]]] = {}
+    for path in args.history:
+        for entity_id, rows in load_history(path).items():
+            history.setdefault(entity_id, []).extend(rows)
+    samples = merge_streams(sorted(history.get(args.switch, [])), sorted(history.get(args.power, [])))
+
+    params = ControlParams(args.minimum_power, args.manual_max_duration * 60, args.malfunction_window)
+    output: dict[str, Any] = {"samples": len(samples), "replay": replay(params, samples, schedule).summary()}
+    if args.sweep:
+        thresholds = [float(v) for v in args.sweep.split(",") if v.strip()]
+        output["sweep"] = {str(k): v for k, v in sweep_minimum_power(samples, thresholds, args.malfunction_window).items()}
+    print(json.dumps(output, indent=2))
+
+if __name__ == "__main__":
+    main()
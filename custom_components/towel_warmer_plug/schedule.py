@@ -0,0 +1,166 @@
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+from typing import Any, Optional
+import re
+from homeassistant.util import dt as dt_util
+
+# Posições na semana em microssegundos desde segunda-feira 00:00 (hora local)
+_SECOND = 1_000_000
+_DAY = 86_400 * _SECOND
+_WEEK = 7 * _DAY
+
+DAY_NAMES = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+_DAY_ALIASES = {
+    "daily": tuple(range(7)),
+    "weekdays": tuple(range(5)),
+    "weekends": (5, 6),
+}
+_WINDOW_RE = re.compile(r"^(\d{1,2}:\d{2}(?::\d{2})?)\s*-\s*(\d{1,2}:\d{2}(?::\d{2})?)$")
+
+def parse_time(value: Any) -> time:
+    """Parse a schedule time given as time or "HH:MM[:SS]" string."""
+    if isinstance(value, time):
+        return value
+    parsed = dt_util.parse_time(str(value))
+    if parsed is None:
+        raise ValueError(f"Invalid time: {value}")
+    return parsed
+
+def _time_offset(value: time) -> int:
+    return ((value.hour * 60 + value.minute) * 60 + value.second) * _SECOND + value.microsecond
+
+def _parse_days(value: str) -> tuple[int, ...]:
+    days: list[int] = []
+    for part in value.split(","):
+        part = part.strip()
+        if part in _DAY_ALIASES:
+            days.extend(_DAY_ALIASES[part])
+        elif "-" in part:
+            first, last = (p.strip() for p in part.split("-", 1))
+            if first not in DAY_NAMES or last not in DAY_NAMES:
+                raise ValueError(f"Invalid day range: {part}")
+            i, j = DAY_NAMES.index(first), DAY_NAMES.index(last)
+            days.extend(range(i, j + 1) if i <= j else [*range(i, 7), *range(0, j + 1)])
+        elif part in DAY_NAMES:
+            days.append(DAY_NAMES.index(part))
+        else:
+            raise ValueError(f"Invalid day: {part}")
+    return tuple(sorted(set(days)))
+
+def parse_weekly_schedule(spec: str) -> list[tuple[tuple[int, ...], time, time]]:
+    """Parse a weekly schedule specification.
+
+    One rule per line (or separated by ";"): an optional day selector followed
+    by comma-separated windows, e.g. "mon-fri 06:30-08:00, 18:00-22:00" or
+    "sat,sun 08:00-23:00". Rules without days apply daily. A window whose end
+    is before its start runs past midnight; equal start and end means all day.
+    """
+    windows = []
+    for rule in re.split(r"[;\n]", spec.lower()):
+        rule = rule.strip()
+        if not rule:
+            continue
+        days = _DAY_ALIASES["daily"]
+        head, _, tail = rule.partition(" ")
+        if head[:1].isalpha():
+            days = _parse_days(head)
+            rule = tail
+        for window in rule.split(","):
+            match = _WINDOW_RE.match(window.strip())
+            if not match:
+                raise ValueError(f"Invalid window: {window.strip()}")
+            windows.append((days, parse_time(match.group(1)), parse_time(match.group(2))))
+    if not windows:
+        raise ValueError("Schedule has no windows")
+    return windows
+
+def _build_index(windows) -> tuple[tuple[int, ...], tuple[int, ...]]:
+    """Expand windows into sorted, merged, inclusive intervals over one week."""
+    intervals = []
+    for days, start, end in windows:
+        start_o, end_o = _time_offset(start), _time_offset(end)
+        for day in days:
+            lo = day * _DAY + start_o
+            if start_o == end_o:
+                lo, hi = day * _DAY, (day + 1) * _DAY - 1
+            elif start_o < end_o:
+                hi = day * _DAY + end_o
+            else:
+                hi = (day + 1) * _DAY + end_o
+            if hi >= _WEEK:
+                intervals.append((lo, _WEEK - 1))
+                intervals.append((0, hi - _WEEK))
+            else:
+                intervals.append((lo, hi))
+
+    intervals.sort()
+    merged: list[list[int]] = []
+    for lo, hi in intervals:
+        if merged and lo <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], hi)
+        else:
+            merged.append([lo, hi])
+    return tuple(i[0] for i in merged), tuple(i[1] for i in merged)
+
+@dataclass(frozen=True)
+class TowelWarmerSchedule:
+    """Weekly warming windows compiled into a sorted interval index.
+
+    Membership and next-transition queries bisect the interval starts, so
+    they cost O(log n) regardless of how many windows are configured.
+    """
+
+    starts: tuple[int, ...]
+    ends: tuple[int, ...]
+
+    @staticmethod
+    def from_times(start: Any, end: Any) -> "TowelWarmerSchedule":
+        """Single daily window, the original configuration."""
+        return TowelWarmerSchedule(*_build_index([(_DAY_ALIASES["daily"], parse_time(start), parse_time(end))]))
+
+    @staticmethod
+    def from_spec(spec: str) -> "TowelWarmerSchedule":
+        return TowelWarmerSchedule(*_build_index(parse_weekly_schedule(spec)))
+
+    @property
+    def always_on(self) -> bool:
+        return self.starts == (0,) and self.ends == (_WEEK - 1,)
+
+    @staticmethod
+    def _offset(now_local: datetime) -> int:
+        return now_local.weekday() * _DAY + _time_offset(now_local.time())
+
+    def _index(self, offset: int) -> int:
+        return bisect_right(self.starts, offset) - 1
+
+    def is_inside(self, now: datetime) -> bool:
+        offset = self._offset(dt_util.as_local(now))
+        i = self._index(offset)
+        return i >= 0 and offset <= self.ends[i]
+
+    def next_transition(self, now: datetime) -> Optional[datetime]:
+        """Next aware datetime after now at which is_inside flips, or None."""
+        if not self.starts or self.always_on:
+            return None
+        now_local = dt_util.as_local(now)
+        offset = self._offset(now_local)
+        i = self._index(offset)
+
+        if i >= 0 and offset <= self.ends[i]:
+            target = self.ends[i]
+            # Intervalo que atravessa o fim da semana continua no primeiro
+            if target == _WEEK - 1 and self.starts[0] == 0:
+                target = _WEEK + self.ends[0]
+            # O fim é inclusivo, a transição é no instante seguinte
+            target += 1
+        elif i + 1 < len(self.starts):
+            target = self.starts[i + 1]
+        else:
+            target = self.starts[0] + _WEEK
+
+        week_start = now_local.date() - timedelta(days=now_local.weekday())
+        days, rest = divmod(target, _DAY)
+        seconds, micro = divmod(rest, _SECOND)
+        wall = time(seconds // 3600, seconds // 60 % 60, seconds % 60, micro)
+        return datetime.combine(week_start + timedelta(days=days), wall, tzinfo=now_local.tzinfo)
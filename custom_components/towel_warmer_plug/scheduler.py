@@ -0,0 +1,123 @@
+from datetime import datetime
+from heapq import heappop, heappush, heapify
+from itertools import count
+from typing import TYPE_CHECKING, Optional
+from homeassistant.core import HomeAssistant, CALLBACK_TYPE, callback
+from homeassistant.helpers.event import async_track_point_in_utc_time
+from homeassistant.util import dt as dt_util
+import asyncio
+import logging
+
+if TYPE_CHECKING:
+    from .coordinator import TowelWarmerCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+# Margem para agrupar warmers com prazos quase simultâneos
+BATCH_SLACK = 0.5  # seconds
+
+class TowelWarmerScheduler:
+    """Domain-wide deadline scheduler shared by all towel warmers.
+
+    Each registered coordinator has at most one pending deadline. Deadlines
+    live in a heap with lazy invalidation, and a single Home Assistant timer
+    is armed at the earliest one; when it fires, every warmer that is due is
+    refreshed in the same batch.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        self.hass = hass
+        self._warmers: set["TowelWarmerCoordinator"] = set()
+        self._deadlines: dict["TowelWarmerCoordinator", float] = {}
+        self._heap: list[tuple[float, int, "TowelWarmerCoordinator"]] = []
+        self._seq = count()
+        self._unsub_timer: Optional[CALLBACK_TYPE] = None
+        self._armed_at: Optional[float] = None
+
+    @callback
+    def async_register(self, coordinator: "TowelWarmerCoordinator"):
+        self._warmers.add(coordinator)
+
+    @callback
+    def async_unregister(self, coordinator: "TowelWarmerCoordinator"):
+        self._warmers.discard(coordinator)
+        self.async_cancel(coordinator)
+        if not self._warmers:
+            self._heap.clear()
+            self._cancel_timer()
+
+    @callback
+    def async_schedule(self, coordinator: "TowelWarmerCoordinator", when: datetime):
+        """Set (or replace) the next deadline of a warmer."""
+        if coordinator not in self._warmers:
+            return
+        ts = when.timestamp()
+        if self._deadlines.get(coordinator) == ts:
+            return
+        self._deadlines[coordinator] = ts
+        heappush(self._heap, (ts, next(self._seq), coordinator))
+        if len(self._heap) > 4 * len(self._deadlines) + 16:
+            self._compact()
+        self._arm()
+
+    @callback
+    def async_cancel(self, coordinator: "TowelWarmerCoordinator"):
+        # A entrada no heap fica obsoleta e é descartada ao ser retirada
+        self._deadlines.pop(coordinator, None)
+
+    def next_deadline(self, coordinator: "TowelWarmerCoordinator") -> Optional[datetime]:
+        ts = self._deadlines.get(coordinator)
+        return dt_util.utc_from_timestamp(ts) if ts is not None else None
+
+    def _compact(self):
+        self._heap = [
+            item for item in self._heap
+            if self._deadlines.get(item[2]) == item[0]
+        ]
+        heapify(self._heap)
+
+    def _discard_stale(self):
+        while self._heap and self._deadlines.get(self._heap[0][2]) != self._heap[0][0]:
+            heappop(self._heap)
+
+    def _cancel_timer(self):
+        if self._unsub_timer:
+            self._unsub_timer()
+            self._unsub_timer = None
+            self._armed_at = None
+
+    def _arm(self):
+        self._discard_stale()
+        if not self._heap:
+            self._cancel_timer()
+            return
+        ts = self._heap[0][0]
+        if self._armed_at is not None and self._armed_at <= ts:
+            return
+        self._cancel_timer()
+        self._armed_at = ts
+        self._unsub_timer = async_track_point_in_utc_time(
+            self.hass, self._handle_timer, dt_util.utc_from_timestamp(ts)
+        )
+
+    @callback
+    def _handle_timer(self, now: datetime):
+        self._unsub_timer = None
+        self._armed_at = None
+        limit = now.timestamp() + BATCH_SLACK
+
+        due = []
+        while self._heap and self._heap[0][0] <= limit:
+            ts, _, coordinator = heappop(self._heap)
+            if self._deadlines.get(coordinator) != ts:
+                continue
+            del self._deadlines[coordinator]
+            due.append(coordinator)
+
+        if due:
+            _LOGGER.debug("Scheduler: %d towel warmer(s) due at %s", len(due), now)
+            self.hass.async_create_task(self._async_refresh(due))
+        self._arm()
+
+    async def _async_refresh(self, due: list["TowelWarmerCoordinator"]):
+        await asyncio.gather(*(c.async_request_refresh() for c in due))
@@ -1,7 +1,12 @@
-from homeassistant.components.sensor import SensorEntity, SensorEntityDescription
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.const import UnitOfEnergy, UnitOfTime
+from homeassistant.core import callback
 from homeassistant.helpers.entity import EntityCategory
-from homeassistant.helpers.entity_registry import async_get as async_get_entity_registry
-from homeassistant.helpers.device_registry import async_get as async_get_device_registry
 from .const import DOMAIN
 from .utils import slugify
 
@@ -11,24 +16,93 @@ SENSOR_TYPES: dict[str, SensorEntityDescription] = {
         name="Status",
         icon="mdi:radiator",
     ),
+    "energy": SensorEntityDescription(
+        key="energy",
+        name="Energy",
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+    ),
+    "heating_time_today": SensorEntityDescription(
+        key="heating_time_today",
+        name="Heating Time Today",
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        native_unit_of_measurement=UnitOfTime.MINUTES,
+    ),
+    "window_energy": SensorEntityDescription(
+        key="window_energy",
+        name="Window Energy",
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+    ),
 }
 
+# Métricas internas, desativadas por omissão no registo de entidades
+METRIC_SENSOR_TYPES: dict[str, SensorEntityDescription] = {
+    "update_duration": SensorEntityDescription(
+        key="update_duration",
+        name="Update Duration",
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        entity_registry_enabled_default=False,
+    ),
+    "service_call": SensorEntityDescription(
+        key="service_call",
+        name="Service Call Latency",
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        entity_registry_enabled_default=False,
+    ),
+    "actuation_lag": SensorEntityDescription(
+        key="actuation_lag",
+        name="Actuation Lag",
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        entity_registry_enabled_default=False,
+    ),
+    "update_failures": SensorEntityDescription(
+        key="update_failures",
+        name="Update Failures",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_registry_enabled_default=False,
+    ),
+}
+
+# Mudam a cada amostra; são publicadas com a próxima mudança real de estado
+_VOLATILE_ATTRIBUTES = frozenset({
+    "power_filtered", "power_ewma", "power_mean", "power_min",
+    "time_below_threshold", "power_samples",
+})
+
 async def async_setup_entry(hass, entry, async_add_entities):
     coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
-
-    entity_registry = async_get_entity_registry(hass)
-    device_registry = async_get_device_registry(hass)
-    entity_entry = entity_registry.async_get(coordinator.config.switch_entity)
-    device_entry = device_registry.async_get(entity_entry.device_id) if entity_entry else None
-    device_identifiers = device_entry.identifiers if device_entry else None
+    device_identifiers = hass.data[DOMAIN][entry.entry_id]["device_identifiers"]
 
     entities = [
         TowelWarmerSensor(coordinator, sensor_id, description, device_identifiers)
         for sensor_id, description in SENSOR_TYPES.items()
     ]
+    if coordinator.metrics.enabled:
+        entities += [
+            TowelWarmerSensor(coordinator, sensor_id, description, device_identifiers)
+            for sensor_id, description in METRIC_SENSOR_TYPES.items()
+        ]
     async_add_entities(entities)
 
 class TowelWarmerSensor(SensorEntity):
+    _attr_should_poll = False
+    # Estatísticas mudam a cada amostra, não vale a pena gravá-las no recorder
+    _unrecorded_attributes = frozenset({
+        "power_filtered", "power_ewma", "power_mean", "power_min",
+        "time_below_threshold", "power_samples", "next_transition", "preheat_start",
+        "cycling", "duty_ratio", "heating_phase", "idle_phase", "eco_savings",
+    })
+
     def __init__(self, coordinator, sensor_id, description, device_identifiers):
         self.coordinator = coordinator
         self.sensor_id = sensor_id
@@ -36,16 +110,26 @@ class TowelWarmerSensor(SensorEntity):
         object_id = slugify(f"{coordinator.config.name}_{sensor_id}")
         self._attr_name = f"{coordinator.config.name} {description.name}"
         self._attr_unique_id = f"towel_warmer_{object_id}"
-        if sensor_id != "status":
+        if sensor_id in METRIC_SENSOR_TYPES:
             self._attr_entity_category = EntityCategory.DIAGNOSTIC
         self._device_identifiers = device_identifiers
+        self._written = None
 
     @property
     def native_value(self):
+        if self.sensor_id in METRIC_SENSOR_TYPES:
+            metrics = self.coordinator.metrics
+            if self.sensor_id == "update_failures":
+                return sum(metrics.failures.values())
+            return metrics.last(self.sensor_id)
+
         data = self.coordinator.data
         if not data:
             return None
-    
+
+        if self.sensor_id != "status":
+            return data.get(self.sensor_id)
+
         if data.get("is_malfunction"):
             return "Malfunction"
         if data.get("manual_override"):
@@ -56,9 +140,23 @@ class TowelWarmerSensor(SensorEntity):
             return "Outside warming hours"
         return "Idle"
 
+    @property
+    def extra_state_attributes(self):
+        data = self.coordinator.data
+        if not data or self.sensor_id != "status":
+            return None
+        attributes = dict(data.get("power_stats") or {})
+        attributes.update(data.get("duty_cycle") or {})
+        if data.get("next_transition"):
+            attributes["next_transition"] = data["next_transition"].isoformat()
+        if data.get("preheat_start"):
+            attributes["preheat_start"] = data["preheat_start"].isoformat()
+        return attributes or None
+
     @property
     def available(self):
-        return self.coordinator.last_update_success
+        # As métricas continuam a fazer sentido quando a atualização falha
+        return self.coordinator.last_update_success or self.sensor_id in METRIC_SENSOR_TYPES
 
     @property
     def device_info(self):
@@ -66,11 +164,27 @@ class TowelWarmerSensor(SensorEntity):
             return {"identifiers": self._device_identifiers}
         return None
 
-    async def async_update(self):
-        await self.coordinator.async_request_refresh()
+    @callback
+    def _handle_coordinator_update(self):
+        """Write state only when what the entity shows has changed.
+
+        Rolling power statistics are left out of the comparison, otherwise
+        the status sensor would be written on nearly every refresh.
+        """
+        attributes = self.extra_state_attributes or {}
+        current = (
+            self.available,
+            self.native_value,
+            {k: v for k, v in attributes.items() if k not in _VOLATILE_ATTRIBUTES},
+        )
+        if current == self._written:
+            return
+        self._written = current
+        self.async_write_ha_state()
 
     async def async_added_to_hass(self):
         self.async_on_remove(
-            self.coordinator.async_add_listener(self.async_write_ha_state)
-        ) 
+            self.coordinator.async_add_listener(self._handle_coordinator_update)
+        )
+
 
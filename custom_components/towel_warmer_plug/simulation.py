@@ -0,0 +1,133 @@
+"""Closed-loop simulation harness for the control state machine.
+
+Drives control.step() against a simulated plug with an injectable clock, so
+edge cases (the malfunction window, override expiry, schedules that wrap past
+midnight) can be checked over days of synthetic time in well under a second.
+
+    params = ControlParams(minimum_power=10, manual_max_duration=3600)
+    result = simulate(params, daily_window(22 * 3600, 6 * 3600), duration=86400,
+                      events=[(3600, MANUAL_ON), (7200, FAULT_START)])
+"""
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Optional
+
+from .control import Action, ControlParams, ControlState, step, next_deadline
+
+MANUAL_ON = "manual_on"
+MANUAL_OFF = "manual_off"
+FAULT_START = "fault_start"
+FAULT_END = "fault_end"
+AUTO_ON = "auto_on"
+AUTO_OFF = "auto_off"
+
+class SimClock:
+    """Manually advanced clock, in POSIX seconds."""
+
+    def __init__(self, start: float = 0.0):
+        self.now = start
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> float:
+        self.now += seconds
+        return self.now
+
+def daily_window(start: float, end: float) -> Callable[[float], bool]:
+    """Inside-schedule predicate for a daily window, in UTC seconds of day.
+
+    Same semantics as TowelWarmerSchedule: the end is inclusive and a window
+    whose end is not after its start wraps past midnight.
+    """
+    if start < end:
+        return lambda ts: start <= ts % 86400 <= end
+    return lambda ts: ts % 86400 >= start or ts % 86400 <= end
+
+@dataclass
+class SimulationResult:
+    ticks: int = 0
+    actions: Counter = field(default_factory=Counter)
+    malfunction_ticks: int = 0
+    first_malfunction: Optional[float] = None
+    on_seconds: float = 0.0
+    log: list[tuple[float, Action]] = field(default_factory=list)
+    state: ControlState = field(default_factory=ControlState)
+
+def simulate(
+    params: ControlParams,
+    inside: Callable[[float], bool],
+    *,
+    duration: float,
+    tick: float = 1.0,
+    clock: Optional[SimClock] = None,
+    rated_power: float = 100.0,
+    events: Iterable[tuple[float, str]] = (),
+    auto_enabled: bool = True,
+    state: Optional[ControlState] = None,
+    keep_log: bool = False,
+) -> SimulationResult:
+    """Run the control loop for duration seconds, evaluating every tick.
+
+    Actions take effect on the simulated plug immediately. Event times are
+    relative to the clock's start and are applied before the tick they fall on.
+    While the inputs and state are unchanged and no control deadline has been
+    reached, step() is known to repeat its last decision and is skipped.
+    """
+    clock = clock or SimClock()
+    start = clock.now
+    pending = sorted((start + at, kind) for at, kind in events)
+    pending.reverse()
+
+    result = SimulationResult()
+    state = state or ControlState()
+    switch_state = "off"
+    faulty = False
+    ticks = int(duration / tick)
+    _step = step
+    actions = result.actions
+    last_inputs = None
+    decision = None
+    deadline = None
+
+    for _ in range(ticks):
+        now = clock.now
+        while pending and pending[-1][0] <= now:
+            _, kind = pending.pop()
+            if kind == MANUAL_ON:
+                switch_state = "on"
+            elif kind == MANUAL_OFF:
+                switch_state = "off"
+            elif kind == FAULT_START:
+                faulty = True
+            elif kind == FAULT_END:
+                faulty = False
+            elif kind == AUTO_ON:
+                auto_enabled = True
+            elif kind == AUTO_OFF:
+                auto_enabled = False
+
+        is_on = switch_state == "on"
+        power = rated_power if is_on and not faulty else 0.0
+        inputs = (switch_state, power, inside(now), auto_enabled)
+        if inputs != last_inputs or decision.actions or (deadline is not None and now >= deadline):
+            state, decision = _step(params, state, now, *inputs)
+            deadline = next_deadline(params, state, now)
+            last_inputs = inputs
+
+        if decision.is_malfunction:
+            result.malfunction_ticks += 1
+            if result.first_malfunction is None:
+                result.first_malfunction = now - start
+        for action in decision.actions:
+            actions[action] += 1
+            switch_state = "on" if action is Action.SCHEDULE_ON else "off"
+            if keep_log:
+                result.log.append((now - start, action))
+        if switch_state == "on":
+            result.on_seconds += tick
+        clock.now = now + tick
+
+    result.ticks = ticks
+    result.state = state
+    return result
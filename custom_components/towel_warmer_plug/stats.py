@@ -0,0 +1,175 @@
+"""Streaming power statistics over a fixed-size ring buffer.
+
+Samples arrive from power sensor state changes. Every statistic is updated
+incrementally: the running sum, the monotonic queue behind the rolling
+minimum and the below-threshold time are adjusted as samples enter and leave
+the window.
+"""
+from collections import deque
+from math import exp
+from typing import Any, Optional
+
+class PowerStats:
+    """Rolling statistics of a power signal sampled on change.
+
+    Each sample holds its value until the next one (the signal is piecewise
+    constant, like a sensor's state), so time-based statistics weight samples
+    by how long they were current.
+    """
+
+    def __init__(
+        self,
+        window: float,
+        threshold: float,
+        capacity: int = 256,
+        ewma_tau: float = 30.0,
+        filter_window: float = 10.0,
+    ):
+        self.window = window
+        self.threshold = threshold
+        self.ewma_tau = ewma_tau
+        self.filter_window = filter_window
+        self._capacity = capacity
+        self._ts: list[float] = [0.0] * capacity
+        self._values: list[float] = [0.0] * capacity
+        self._head = 0  # índice da amostra mais antiga
+        self._size = 0
+        self._sum = 0.0
+        self._below = 0.0  # tempo abaixo do limite entre amostras retidas
+        self._min: deque[tuple[float, float]] = deque()
+        self._ewma: Optional[float] = None  # EWMA no instante da última amostra
+        self.last: Optional[float] = None
+        self.last_ts: Optional[float] = None
+
+    @property
+    def count(self) -> int:
+        return self._size
+
+    def _at(self, offset: int) -> int:
+        return (self._head + offset) % self._capacity
+
+    def add(self, ts: float, value: float):
+        if self.last_ts is not None:
+            if ts < self.last_ts:
+                return
+            # O valor anterior manteve-se durante dt
+            if self.last < self.threshold:
+                self._below += ts - self.last_ts
+            self._ewma = self.ewma_at(ts)
+        else:
+            self._ewma = value
+
+        if self._size == self._capacity:
+            self._pop_oldest()
+        idx = self._at(self._size)
+        self._ts[idx] = ts
+        self._values[idx] = value
+        self._size += 1
+        self._sum += value
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((ts, value))
+        self.last, self.last_ts = value, ts
+        self._evict(ts)
+
+    def _pop_oldest(self):
+        idx = self._head
+        ts, value = self._ts[idx], self._values[idx]
+        self._head = self._at(1)
+        self._size -= 1
+        self._sum -= value
+        if self._size and value < self.threshold:
+            self._below -= self._ts[self._head] - ts
+        if self._min and self._min[0][0] <= ts:
+            self._min.popleft()
+
+    def _evict(self, now: float):
+        """Drop samples that stopped being current before the window start."""
+        start = now - self.window
+        while self._size > 1 and self._ts[self._at(1)] <= start:
+            self._pop_oldest()
+
+    def set_threshold(self, threshold: float):
+        """Change the threshold, recomputing below-threshold time in O(n)."""
+        self.threshold = threshold
+        self._below = 0.0
+        for i in range(self._size - 1):
+            if self._values[self._at(i)] < threshold:
+                self._below += self._ts[self._at(i + 1)] - self._ts[self._at(i)]
+
+    def set_window(self, window: float):
+        """Change the window; a shorter one drops the samples now outside it."""
+        self.window = window
+        if self.last_ts is not None:
+            self._evict(self.last_ts)
+
+    def ewma_at(self, now: float) -> Optional[float]:
+        """Continuous-time EWMA, with the last sample held until now."""
+        if self._ewma is None:
+            return None
+        alpha = 1 - exp(-max(0.0, now - self.last_ts) / self.ewma_tau)
+        return self._ewma + (self.last - self._ewma) * alpha
+
+    def rolling_mean(self) -> Optional[float]:
+        return self._sum / self._size if self._size else None
+
+    def rolling_min(self) -> Optional[float]:
+        return self._min[0][1] if self._min else None
+
+    def time_below(self, now: float) -> float:
+        """Seconds below threshold within [now - window, now]."""
+        if not self._size:
+            return 0.0
+        self._evict(now)
+        start = now - self.window
+        below = self._below
+        first_ts, first = self._ts[self._head], self._values[self._head]
+        # A primeira amostra pode começar antes da janela
+        if self._size > 1 and first < self.threshold and first_ts < start:
+            below -= start - first_ts
+        if self.last < self.threshold:
+            below += now - max(self.last_ts, start)
+        return max(0.0, min(below, self.window))
+
+    def filtered_at(self, now: float) -> Optional[float]:
+        """Time-weighted median over the last filter_window seconds.
+
+        Readings current for less than half the filter window are rejected as
+        spikes, however many samples report them, and a reading held that long
+        wins even if it arrived as a single sample.
+        """
+        if not self._size:
+            return None
+        start = now - self.filter_window
+        weighted = []
+        end = now
+        for i in range(self._size - 1, -1, -1):
+            ts, value = self._ts[self._at(i)], self._values[self._at(i)]
+            weighted.append((value, end - max(ts, start)))
+            if ts <= start:
+                break
+            end = ts
+        total = sum(weight for _, weight in weighted)
+        if total <= 0:
+            return self.last
+        acc = 0.0
+        for value, weight in sorted(weighted):
+            acc += weight
+            if acc >= total / 2:
+                return value
+        return self.last
+
+    def settles_at(self) -> Optional[float]:
+        """When the filter will have only the last sample in its window."""
+        return self.last_ts + self.filter_window if self.last_ts is not None else None
+
+    def as_dict(self, now: float) -> dict[str, Any]:
+        mean, minimum, ewma = self.rolling_mean(), self.rolling_min(), self.ewma_at(now)
+        return {
+            "power_filtered": round(self.filtered_at(now), 2) if self._size else None,
+            "power_ewma": round(ewma, 2) if ewma is not None else None,
+            "power_mean": round(mean, 2) if mean is not None else None,
+            "power_min": round(minimum, 2) if minimum is not None else None,
+            "time_below_threshold": round(self.time_below(now), 1),
+            "power_samples": self._size,
+        }
@@ -0,0 +1,108 @@
+import asyncio
+from typing import Any, Optional
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+import logging
+
+from .const import DOMAIN, STORAGE_VERSION, STORAGE_SAVE_DELAY
+from .utils import slugify
+
+_LOGGER = logging.getLogger(__name__)
+
+class TowelWarmerStore:
+    """One storage file for every towel warmer, keyed by config entry id.
+
+    Loaded once when the integration is set up. Changes from all warmers
+    are coalesced through Store.async_delay_save into a single write of the
+    whole file. Pending data is flushed on unload, and Store itself writes
+    it on Home Assistant's final write event.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        self.hass = hass
+        self._store = Store(hass, STORAGE_VERSION, DOMAIN)
+        self._warmers: dict[str, dict[str, Any]] = {}
+        self._pending = False
+        self.writes = 0
+
+    async def async_load(self):
+        data = await self._store.async_load() or {}
+        self._warmers = dict(data.get("warmers", {}))
+        _LOGGER.debug("Loaded persistent data for %d towel warmer(s).", len(self._warmers))
+
+    def get(self, entry_id: str) -> Optional[dict[str, Any]]:
+        return self._warmers.get(entry_id)
+
+    @callback
+    def async_schedule_save(self, entry_id: str, data: dict[str, Any]) -> bool:
+        """Schedule a delayed write if the warmer's data changed."""
+        if self._warmers.get(entry_id) == data:
+            return False
+        self._warmers[entry_id] = dict(data)
+        self._delay_save()
+        return True
+
+    @callback
+    def async_remove(self, entry_id: str):
+        if self._warmers.pop(entry_id, None) is not None:
+            self._delay_save()
+
+    @callback
+    def _delay_save(self):
+        self._pending = True
+        self._store.async_delay_save(self._data_to_save, STORAGE_SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        self._pending = False
+        self.writes += 1
+        return {"warmers": self._warmers}
+
+    async def async_flush(self):
+        """Write any pending data immediately."""
+        if self._pending:
+            await self._store.async_save(self._data_to_save())
+
+    async def async_migrate_legacy(self, entries: dict[str, str]):
+        """Move data from the per-name files of older versions.
+
+        entries maps entry id to warmer name. Missing entries are read
+        concurrently and written back with a single save.
+        """
+        missing = {entry_id: name for entry_id, name in entries.items() if entry_id not in self._warmers}
+        if not missing:
+            return
+        legacy = {
+            entry_id: Store(self.hass, STORAGE_VERSION, f"{DOMAIN}_{slugify(name)}")
+            for entry_id, name in missing.items()
+        }
+        loaded = await asyncio.gather(*(store.async_load() for store in legacy.values()))
+        migrated = {entry_id: dict(data) for entry_id, data in zip(legacy, loaded) if data}
+        if not migrated:
+            return
+        self._warmers.update(migrated)
+        self._pending = True
+        await self.async_flush()
+        await asyncio.gather(*(legacy[entry_id].async_remove() for entry_id in migrated))
+        _LOGGER.info("Migrated persistent data of %d towel warmer(s) to the shared store.", len(migrated))
+
+class TowelWarmerStorage:
+    """A single warmer's view of the shared store."""
+
+    def __init__(self, store: TowelWarmerStore, entry_id: str):
+        self._store = store
+        self._entry_id = entry_id
+
+    async def async_load(self) -> Optional[dict[str, Any]]:
+        return self._store.get(self._entry_id)
+
+    @callback
+    def async_schedule_save(self, data: dict[str, Any]) -> bool:
+        return self._store.async_schedule_save(self._entry_id, data)
+
+    @callback
+    def async_remove(self):
+        self._store.async_remove(self._entry_id)
+
+    async def async_flush(self):
+        await self._store.async_flush()
@@ -1,7 +1,5 @@
 from homeassistant.components.switch import SwitchEntity
 from homeassistant.helpers.restore_state import RestoreEntity
-from homeassistant.helpers.entity_registry import async_get as async_get_entity_registry
-from homeassistant.helpers.device_registry import async_get as async_get_device_registry
 from .const import DOMAIN
 from .utils import slugify
 
@@ -9,18 +7,15 @@ AUTO_CONTROL_SWITCH_KEY = "auto_control"
 
 async def async_setup_entry(hass, entry, async_add_entities):
     coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
-
-    entity_registry = async_get_entity_registry(hass)
-    device_registry = async_get_device_registry(hass)
-    entity_entry = entity_registry.async_get(coordinator.config.switch_entity)
-    device_entry = device_registry.async_get(entity_entry.device_id) if entity_entry else None
-    device_identifiers = device_entry.identifiers if device_entry else None
+    device_identifiers = hass.data[DOMAIN][entry.entry_id]["device_identifiers"]
 
     async_add_entities([
         TowelWarmerAutoControlSwitch(coordinator, device_identifiers)
     ])
 
 class TowelWarmerAutoControlSwitch(SwitchEntity, RestoreEntity):
+    _attr_should_poll = False
+
     def __init__(self, coordinator, device_identifiers):
         self.coordinator = coordinator
         object_id = slugify(f"{coordinator.config.name}_control")
@@ -34,18 +29,26 @@ class TowelWarmerAutoControlSwitch(SwitchEntity, RestoreEntity):
         old_state = await self.async_get_last_state()
         if old_state is not None:
             self._attr_is_on = old_state.state == "on"
+        self.coordinator.async_set_auto_enabled(self._attr_is_on)
+        # Sem o switch não há controlo automático, como antes
+        self.async_on_remove(lambda: self.coordinator.async_set_auto_enabled(False, refresh=False))
 
     @property
     def is_on(self):
         return self._attr_is_on
 
-    def turn_on(self, **kwargs):
-        self._attr_is_on = True
-        self.schedule_update_ha_state()
+    async def async_turn_on(self, **kwargs):
+        await self._async_set(True)
+
+    async def async_turn_off(self, **kwargs):
+        await self._async_set(False)
 
-    def turn_off(self, **kwargs):
-        self._attr_is_on = False
-        self.schedule_update_ha_state()
+    async def _async_set(self, is_on: bool):
+        if self._attr_is_on == is_on:
+            return
+        self._attr_is_on = is_on
+        self.async_write_ha_state()
+        self.coordinator.async_set_auto_enabled(is_on)
 
     @property
     def device_info(self):
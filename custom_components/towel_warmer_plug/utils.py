@@ -35,4 +35,15 @@ def _safe_parse_dt(value: Any, *, assume_tz: timezone = timezone.utc) -> Optiona
         except Exception as err:
             _LOGGER.debug("Failed to parse datetime from '%s': %s", value, err)
 
-    return None
\ No newline at end of file
+    return None
+
+def _isoformat_ts(value: Optional[float]) -> Optional[str]:
+    """Format a POSIX timestamp for storage, keeping None as None."""
+    if value is None:
+        return None
+    return dt_util.utc_from_timestamp(value).isoformat()
+
+def _local_day_start(ts: float) -> float:
+    """POSIX timestamp of local midnight for the day containing ts."""
+    local = dt_util.as_local(dt_util.utc_from_timestamp(ts))
+    return dt_util.start_of_local_day(local).timestamp()
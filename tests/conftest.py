@@ -0,0 +1,60 @@
+"""Test fixtures.
+
+Run from the repository root:
+
+    pip install -r tests/requirements.txt
+    pytest tests
+"""
+from datetime import timezone
+from pathlib import Path
+import sys
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from homeassistant.core import HomeAssistant
+from homeassistant.setup import async_setup_component
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.towel_warmer_plug.const import (
+    DOMAIN, CONF_NAME, CONF_SWITCH, CONF_POWER, CONF_START_TIME, CONF_END_TIME, CONF_MINIMUM_POWER,
+)
+from custom_components.towel_warmer_plug.utils import slugify
+
+@pytest.fixture
+def utc_default():
+    """Make UTC the local time zone, as schedules are in local time."""
+    previous = dt_util.DEFAULT_TIME_ZONE
+    dt_util.set_default_time_zone(timezone.utc)
+    yield
+    dt_util.set_default_time_zone(previous)
+
+def make_entry(name: str = "Bathroom", **options) -> MockConfigEntry:
+    """Config entry for a warmer whose window covers the whole day."""
+    slug = slugify(name)
+    return MockConfigEntry(
+        domain=DOMAIN,
+        title=name,
+        data={
+            CONF_NAME: name,
+            CONF_SWITCH: f"switch.{slug}_plug",
+            CONF_POWER: f"sensor.{slug}_plug_power",
+            CONF_START_TIME: "00:00:00",
+            CONF_END_TIME: "23:59:59",
+            CONF_MINIMUM_POWER: 10.0,
+        },
+        options=options,
+    )
+
+async def async_setup_warmers(hass: HomeAssistant, *entries: MockConfigEntry, config: dict | None = None):
+    """Add the entries with their plugs on and heating, then set up the integration."""
+    for entry in entries:
+        entry.add_to_hass(hass)
+        hass.states.async_set(entry.data[CONF_SWITCH], "on")
+        hass.states.async_set(entry.data[CONF_POWER], "120")
+    assert await async_setup_component(hass, DOMAIN, config or {})
+    await hass.async_block_till_done()
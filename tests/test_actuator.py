@@ -0,0 +1,106 @@
+"""Switch actuation queue: batching, confirmation and retries."""
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from homeassistant.core import Context
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed, async_mock_service
+
+from custom_components.towel_warmer_plug.actuator import (
+    CONFIRM_TIMEOUT, MAX_ATTEMPTS, RETRY_BACKOFF, TowelWarmerActuator,
+)
+from custom_components.towel_warmer_plug.metrics import WarmerMetrics
+
+class FakeCoordinator:
+    """Just what the actuator reads from a coordinator."""
+
+    def __init__(self, name: str):
+        self.config = SimpleNamespace(name=name)
+        self.metrics = WarmerMetrics()
+        self.async_command_failed = MagicMock()
+
+async def test_commands_are_batched_and_confirmed(hass):
+    calls = async_mock_service(hass, "switch", "turn_on")
+    actuator = TowelWarmerActuator(hass)
+    a, b = FakeCoordinator("a"), FakeCoordinator("b")
+    assert actuator.async_command(a, "switch.a", "turn_on")
+    assert actuator.async_command(b, "switch.b", "turn_on")
+    assert not actuator.async_command(a, "switch.a", "turn_on")
+    await hass.async_block_till_done()
+
+    assert len(calls) == 1
+    assert calls[0].data["entity_id"] == ["switch.a", "switch.b"]
+    hass.states.async_set("switch.a", "on")
+    assert actuator.async_confirm(hass.states.get("switch.a")) is not None
+    assert actuator.pending("switch.a") is None
+    assert actuator.pending("switch.b") is not None
+    actuator.async_cancel(b)
+    assert actuator.pending("switch.b") is None
+
+async def test_unconfirmed_command_is_retried_then_dropped(hass):
+    calls = async_mock_service(hass, "switch", "turn_off")
+    hass.states.async_set("switch.a", "on")
+    actuator = TowelWarmerActuator(hass)
+    a = FakeCoordinator("a")
+    actuator.async_command(a, "switch.a", "turn_off")
+    await hass.async_block_till_done()
+    assert len(calls) == 1
+
+    now = dt_util.utcnow()
+    for attempt in range(1, MAX_ATTEMPTS):
+        now += timedelta(seconds=CONFIRM_TIMEOUT + 1)
+        async_fire_time_changed(hass, now)
+        await hass.async_block_till_done()
+        now += timedelta(seconds=RETRY_BACKOFF * 2 ** (attempt - 1) + 1)
+        async_fire_time_changed(hass, now)
+        await hass.async_block_till_done()
+        assert len(calls) == attempt + 1
+
+    now += timedelta(seconds=CONFIRM_TIMEOUT + 1)
+    async_fire_time_changed(hass, now)
+    await hass.async_block_till_done()
+    assert actuator.pending("switch.a") is None
+    assert a.metrics.counters["retries"] == MAX_ATTEMPTS - 1
+    assert a.metrics.counters["commands_failed"] == 1
+    a.async_command_failed.assert_called_once()
+
+async def test_plug_reporting_in_time_is_not_retried(hass):
+    calls = async_mock_service(hass, "switch", "turn_off")
+    hass.states.async_set("switch.a", "on")
+    actuator = TowelWarmerActuator(hass)
+    a = FakeCoordinator("a")
+    actuator.async_command(a, "switch.a", "turn_off")
+    await hass.async_block_till_done()
+    # O plug reporta sem passar pelo coordenador: o timeout confirma pelo estado
+    hass.states.async_set("switch.a", "off")
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=CONFIRM_TIMEOUT + 1))
+    await hass.async_block_till_done()
+    assert actuator.pending("switch.a") is None
+    assert len(calls) == 1
+    assert "retries" not in a.metrics.counters
+
+async def test_changes_are_attributed_by_context(hass):
+    async_mock_service(hass, "switch", "turn_on")
+    hass.states.async_set("switch.a", "off")
+    actuator = TowelWarmerActuator(hass)
+    a = FakeCoordinator("a")
+    actuator.async_command(a, "switch.a", "turn_on")
+    await hass.async_block_till_done()
+    context = actuator.pending("switch.a").context
+
+    # Um utilizador a desligar com o comando ainda pendente não é nosso
+    hass.states.async_set("switch.a", "off", {"by": "user"}, context=Context())
+    assert not actuator.is_own_change(hass.states.get("switch.a"))
+    # Plugs assíncronos reportam com um contexto novo, mas no estado pedido
+    hass.states.async_set("switch.a", "on", context=Context())
+    assert actuator.is_own_change(hass.states.get("switch.a"))
+    actuator.async_confirm(hass.states.get("switch.a"))
+
+    # Sem comando pendente, só o contexto da chamada (ou um filho) conta
+    hass.states.async_set("switch.a", "off", context=Context())
+    assert not actuator.is_own_change(hass.states.get("switch.a"))
+    hass.states.async_set("switch.a", "on", context=context)
+    assert actuator.is_own_change(hass.states.get("switch.a"))
+    hass.states.async_set("switch.a", "off", context=Context(parent_id=context.id))
+    assert actuator.is_own_change(hass.states.get("switch.a"))
@@ -0,0 +1,77 @@
+"""Bulk import: per-item validation, updates in place and new entries."""
+import pytest
+from homeassistant.exceptions import HomeAssistantError
+
+from custom_components.towel_warmer_plug.bulk import validate_warmers
+from custom_components.towel_warmer_plug.const import CONF_MINIMUM_POWER, DOMAIN
+
+from conftest import async_setup_warmers, make_entry
+
+pytestmark = pytest.mark.usefixtures("enable_custom_integrations")
+
+def warmer(name: str, **settings) -> dict:
+    slug = name.lower()
+    return {"name": name, "switch_entity": f"switch.{slug}_plug", "power_sensor": f"sensor.{slug}_plug_power", **settings}
+
+def test_each_item_is_validated_on_its_own():
+    valid, results = validate_warmers([
+        warmer("Bathroom", start_time="06:30"),
+        warmer("Hall", start_time=1080),  # 18:00 sem aspas em YAML
+        warmer("bathroom"),
+        {**warmer("Kitchen"), "switch_entity": "switch.bathroom_plug"},
+        "not a warmer",
+    ])
+    assert [item["name"] for item, _ in valid] == ["Bathroom"]
+    assert valid[0][0]["start_time"] == "06:30:00"
+    assert [result.get("status") for result in results] == [None, "error", "error", "error", "error"]
+    assert "quoted" in results[1]["error"]
+    assert "duplicate name" in results[2]["error"]
+    assert "already used" in results[3]["error"]
+
+async def test_service_updates_creates_and_reports(hass):
+    bathroom = make_entry("Bathroom")
+    await async_setup_warmers(hass, bathroom)
+    hass.states.async_set("switch.kitchen_plug", "on")
+    hass.states.async_set("sensor.kitchen_plug_power", "120")
+    items = [
+        {**warmer("Bathroom"), "start_time": "00:00", "end_time": "23:59:59", CONF_MINIMUM_POWER: 25},
+        warmer("Kitchen"),
+        warmer("Hall", start_time="25:00"),
+    ]
+
+    response = await hass.services.async_call(
+        DOMAIN, "import_warmers", {"warmers": items}, blocking=True, return_response=True
+    )
+    await hass.async_block_till_done()
+    statuses = [result["status"] for result in response["results"]]
+    assert statuses == ["updated", "created", "error"]
+    assert bathroom.options[CONF_MINIMUM_POWER] == 25
+    assert {entry.title for entry in hass.config_entries.async_entries(DOMAIN)} == {"Bathroom", "Kitchen"}
+
+    response = await hass.services.async_call(
+        DOMAIN, "import_warmers", {"warmers": items[:1]}, blocking=True, return_response=True
+    )
+    assert response["results"][0]["status"] == "unchanged"
+
+async def test_service_reads_files_from_the_config_dir(hass, tmp_path):
+    await async_setup_warmers(hass, make_entry("Bathroom"))
+    hass.config.config_dir = str(tmp_path / "config")
+    (tmp_path / "config").mkdir()
+    (tmp_path / "config" / "towel_warmers.yaml").write_text(
+        "warmers:\n"
+        "  - name: Bathroom\n"
+        "    switch_entity: switch.bathroom_plug\n"
+        "    power_sensor: sensor.bathroom_plug_power\n"
+        "    minimum_power: 30\n"
+    )
+    (tmp_path / "outside.yaml").write_text("[]\n")
+
+    response = await hass.services.async_call(
+        DOMAIN, "import_warmers", {"path": "towel_warmers.yaml"}, blocking=True, return_response=True
+    )
+    assert response["results"][0]["status"] == "updated"
+    with pytest.raises(HomeAssistantError, match="not allowed"):
+        await hass.services.async_call(
+            DOMAIN, "import_warmers", {"path": "../outside.yaml"}, blocking=True, return_response=True
+        )
+    await hass.async_block_till_done()
@@ -0,0 +1,69 @@
+"""Edge cases of the control state machine, driven by the simulation harness."""
+from custom_components.towel_warmer_plug.control import Action, ControlParams, ControlState, step
+from custom_components.towel_warmer_plug.simulation import (
+    FAULT_END, FAULT_START, MANUAL_OFF, MANUAL_ON, daily_window, simulate,
+)
+
+PARAMS = ControlParams(minimum_power=10, manual_max_duration=1800, malfunction_delay=60)
+
+def always(ts):
+    return True
+
+def never(ts):
+    return False
+
+def test_malfunction_after_full_window():
+    result = simulate(PARAMS, always, duration=400, events=[(100, FAULT_START)])
+    assert result.first_malfunction == 160
+
+def test_no_malfunction_one_second_short():
+    result = simulate(PARAMS, always, duration=400, events=[(100, FAULT_START), (159, FAULT_END)])
+    assert result.first_malfunction is None
+    assert result.malfunction_ticks == 0
+
+def test_malfunction_clears_when_power_returns():
+    result = simulate(PARAMS, always, duration=400, events=[(100, FAULT_START), (200, FAULT_END)])
+    assert result.first_malfunction == 160
+    assert result.malfunction_ticks == 40
+    assert result.state.power_low_since is None
+
+def test_manual_override_expires():
+    result = simulate(PARAMS, never, duration=4000, events=[(10, MANUAL_ON)], keep_log=True)
+    # O limite é estrito: expira no primeiro segundo depois de 1800 s
+    assert result.log == [(1811, Action.OVERRIDE_EXPIRED)]
+    assert not result.state.manual_override
+
+def test_manual_off_ends_override():
+    result = simulate(PARAMS, never, duration=4000, events=[(10, MANUAL_ON), (600, MANUAL_OFF)], keep_log=True)
+    assert result.log == []
+    assert not result.state.manual_override
+    assert result.on_seconds == 590
+
+def test_manual_on_inside_window_is_not_turned_off():
+    result = simulate(PARAMS, daily_window(0, 3600), duration=1000, events=[(0, MANUAL_ON)], keep_log=True)
+    assert Action.SCHEDULE_OFF not in result.actions
+    assert result.on_seconds == 1000
+
+def test_window_past_midnight():
+    result = simulate(PARAMS, daily_window(22 * 3600, 6 * 3600), duration=2 * 86400, keep_log=True)
+    # O fim da janela é inclusivo
+    assert result.log == [
+        (0, Action.SCHEDULE_ON),
+        (6 * 3600 + 1, Action.SCHEDULE_OFF),
+        (22 * 3600, Action.SCHEDULE_ON),
+        (86400 + 6 * 3600 + 1, Action.SCHEDULE_OFF),
+        (86400 + 22 * 3600, Action.SCHEDULE_ON),
+    ]
+    assert result.malfunction_ticks == 0
+
+def test_auto_disabled_takes_no_action():
+    result = simulate(PARAMS, always, duration=600, auto_enabled=False)
+    assert not result.actions
+    assert result.on_seconds == 0
+
+def test_waiting_without_grant():
+    state, decision = step(PARAMS, ControlState(), 0, "off", 0.0, True, True, can_turn_on=False)
+    assert decision.waiting
+    assert decision.actions == ()
+    _, decision = step(PARAMS, state, 1, "off", 0.0, True, True)
+    assert decision.actions == (Action.SCHEDULE_ON,)
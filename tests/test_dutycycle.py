@@ -0,0 +1,61 @@
+"""Thermostat duty-cycle detection."""
+import pytest
+
+from custom_components.towel_warmer_plug.dutycycle import DutyCycleDetector, FALL, MIN_PHASE, RISE
+
+def cycle(detector: DutyCycleDetector, start: float, on: float, off: float) -> float:
+    """Feed one heating phase and one idle phase; returns when the next starts."""
+    for ts, power in ((start, 400), (start + on, 0)):
+        detector.add(ts, power)
+        detector.confirm(ts + MIN_PHASE)
+    return start + on + off
+
+def test_edges_are_confirmed_after_min_phase():
+    detector = DutyCycleDetector(threshold=10)
+    assert detector.add(0, 400) is None
+    assert detector.add(300, 0) is None
+    assert detector.pending_until() == 300 + MIN_PHASE
+    assert detector.confirm(300 + MIN_PHASE - 1) is None
+    assert detector.confirm(300 + MIN_PHASE) == FALL
+    assert detector.phase_start == 300
+    assert detector.add(900, 400) is None
+    assert detector.add(900 + MIN_PHASE, 400) == RISE
+    assert detector.off_time == pytest.approx(600)
+
+def test_learns_phase_lengths():
+    detector = DutyCycleDetector(threshold=10)
+    ts = 0.0
+    for _ in range(4):
+        ts = cycle(detector, ts, on=300, off=600)
+    detector.add(ts, 400)
+    detector.confirm(ts + MIN_PHASE)
+    assert detector.cycling
+    assert detector.on_time == pytest.approx(300)
+    assert detector.off_time == pytest.approx(600)
+    assert detector.duty_ratio == pytest.approx(1 / 3)
+
+def test_dip_shorter_than_min_phase_is_not_an_edge():
+    detector = DutyCycleDetector(threshold=10)
+    ts = 0.0
+    for _ in range(4):
+        ts = cycle(detector, ts, on=300, off=600)
+    detector.add(ts, 400)
+    detector.confirm(ts + MIN_PHASE)
+    on_time = detector.on_time
+    assert detector.add(ts + 100, 0) is None
+    # A potência volta antes de MIN_PHASE: não há descida nem fase nova
+    assert detector.add(ts + 100 + MIN_PHASE / 2, 400) is None
+    assert detector.pending_until() is None
+    assert detector.confirm(ts + 100 + MIN_PHASE) is None
+    assert detector.on_time == on_time
+    assert detector.add(ts + 300, 0) is None
+    assert detector.confirm(ts + 300 + MIN_PHASE) == FALL
+    assert detector.on_time == pytest.approx(on_time + (300 - on_time) * 0.3)
+
+def test_switching_drops_a_pending_crossing():
+    detector = DutyCycleDetector(threshold=10)
+    detector.add(0, 400)
+    detector.add(300, 0)
+    detector.switched(305, False)
+    assert detector.pending_until() is None
+    assert detector.confirm(400) is None
@@ -0,0 +1,92 @@
+"""Energy and heating-time accounting."""
+import pytest
+
+from custom_components.towel_warmer_plug.energy import EnergyMeter
+
+DAY = 86400
+
+def day_start(ts: float) -> float:
+    return ts // DAY * DAY
+
+def make() -> EnergyMeter:
+    return EnergyMeter(threshold=10, day_start=day_start)
+
+def test_total_never_decreases_when_power_drops():
+    meter = make()
+    meter.add(0, 400)
+    assert meter.values(3600)["energy"] == pytest.approx(0.4)
+    meter.add(3600, 0)
+    assert meter.values(3600)["energy"] == pytest.approx(0.4)
+    assert meter.values(7200)["energy"] == pytest.approx(0.4)
+
+def test_total_is_monotonic_over_a_varying_signal():
+    meter = make()
+    previous = 0.0
+    for i, power in enumerate([400, 0, 250, 250, 10, 0, 400, 5]):
+        ts = i * 600
+        meter.add(ts, power)
+        for now in (ts, ts + 300):
+            value = meter.values(now)["energy"]
+            assert value >= previous
+            previous = value
+
+def test_close_accounts_the_open_segment():
+    meter = make()
+    meter.add(0, 1000)
+    meter.close(1800)
+    assert meter.as_dict()["total_kwh"] == pytest.approx(0.5)
+    assert meter.values(1800)["energy"] == pytest.approx(0.5)
+
+def test_heating_time_resets_at_day_boundary():
+    meter = make()
+    meter.add(DAY - 1800, 400)
+    assert meter.values(DAY - 1)["heating_time_today"] == pytest.approx(30, abs=0.1)
+    assert meter.next_day(DAY - 1) == DAY
+    # Só conta a parte depois da meia-noite
+    assert meter.values(DAY + 600)["heating_time_today"] == pytest.approx(10)
+
+def test_heating_time_only_above_threshold():
+    meter = make()
+    meter.add(0, 5)
+    meter.add(600, 400)
+    assert meter.values(1200)["heating_time_today"] == pytest.approx(10)
+
+def test_window_energy_restarts_when_window_opens():
+    meter = make()
+    meter.add(0, 1000)
+    meter.set_inside(0, True)
+    meter.set_inside(3600, False)
+    assert meter.values(7200)["window_energy"] == pytest.approx(1.0)
+    meter.set_inside(7200, True)
+    assert meter.values(7200)["window_energy"] == 0
+    assert meter.values(9000)["window_energy"] == pytest.approx(0.5)
+    assert meter.values(9000)["energy"] == pytest.approx(2.5)
+
+def test_checkpoint_only_after_meaningful_change():
+    meter = make()
+    meter.add(0, 100)
+    first = meter.checkpoint()
+    meter.add(60, 100)  # ~1.7 Wh
+    assert meter.checkpoint() is first
+    meter.add(600, 100)
+    assert meter.checkpoint()["total_kwh"] == pytest.approx(600 * 100 / 3_600_000)
+
+def test_restore_round_trip():
+    meter = make()
+    meter.add(0, 400)
+    meter.add(3600, 0)
+    restored = make()
+    restored.restore(meter.checkpoint(force=True))
+    assert restored.as_dict() == meter.as_dict()
+
+def test_restore_mid_window_keeps_window_energy():
+    meter = make()
+    meter.set_inside(0, True)
+    meter.add(0, 1000)
+    meter.add(3600, 1000)
+    restored = make()
+    restored.restore(meter.checkpoint(force=True))
+    # Primeira atualização depois do reinício, ainda dentro da janela
+    restored.set_inside(3700, True)
+    restored.add(3700, 1000)
+    assert restored.values(7300)["window_energy"] == pytest.approx(2.0)
@@ -0,0 +1,84 @@
+"""Household power budget: grants, staggering and rotation."""
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from custom_components.towel_warmer_plug.load_manager import TowelWarmerLoadManager
+
+class FakeWarmer:
+    """Just what the load manager reads from a coordinator."""
+
+    def __init__(self, name: str):
+        self.config = SimpleNamespace(name=name, minimum_power=10)
+        self.async_request_refresh = MagicMock()
+
+def warmer(name: str) -> FakeWarmer:
+    return FakeWarmer(name)
+
+def manager(**kwargs) -> TowelWarmerLoadManager:
+    options = {"budget": 1000, "stagger": 0, "rotation": 900, "default_draw": 400}
+    options.update(kwargs)
+    return TowelWarmerLoadManager(MagicMock(), **options)
+
+def test_unlimited_budget_always_grants():
+    lm = manager(budget=0)
+    a = warmer("a")
+    assert lm.holds_grant(a)
+    assert lm.async_request(a, 0)
+
+def test_waits_until_budget_is_freed():
+    lm = manager()
+    a, b, c = warmer("a"), warmer("b"), warmer("c")
+    assert lm.async_request(a, 0)
+    assert lm.async_request(b, 0)
+    assert not lm.async_request(c, 0)
+    lm.async_update(a, is_on=False, manual=False, wants_on=False, now=10)
+    assert lm.holds_grant(c)
+
+def test_manual_warmers_count_against_budget():
+    lm = manager()
+    a, b, c = warmer("a"), warmer("b"), warmer("c")
+    lm.async_update(a, is_on=True, manual=True, wants_on=False, now=0)
+    lm.async_update(b, is_on=True, manual=True, wants_on=False, now=0)
+    assert not lm.async_request(c, 0)
+
+def test_learned_draw_is_used():
+    lm = manager()
+    a, b = warmer("a"), warmer("b")
+    lm.observe(a, 900)
+    assert lm.async_request(a, 0)
+    assert not lm.async_request(b, 0)
+    # Leituras abaixo do mínimo não são consumo
+    lm.observe(a, 1)
+    assert lm.learned_draw(a) == 900
+
+def test_turn_ons_are_staggered():
+    lm = manager(budget=0, stagger=5)
+    a, b = warmer("a"), warmer("b")
+    assert lm.async_request(a, 0)
+    assert not lm.async_request(b, 1)
+    assert lm.next_deadline(b, 1) == 5
+    lm.async_update(a, is_on=True, manual=False, wants_on=False, now=5)
+    assert lm.holds_grant(b)
+
+def test_least_recently_served_starts_first():
+    lm = manager(budget=400)
+    a, b, c = warmer("a"), warmer("b"), warmer("c")
+    assert lm.async_request(a, 50)
+    lm.async_update(a, is_on=False, manual=False, wants_on=False, now=100)
+    assert lm.async_request(b, 100)
+    assert not lm.async_request(a, 200)
+    assert not lm.async_request(c, 201)
+    lm.async_update(b, is_on=False, manual=False, wants_on=False, now=300)
+    # c nunca foi servido, passa à frente de a
+    assert lm.holds_grant(c)
+    assert not lm.holds_grant(a)
+
+def test_rotation_asks_oldest_to_yield():
+    lm = manager(budget=400, rotation=900)
+    a, b = warmer("a"), warmer("b")
+    assert lm.async_request(a, 0)
+    assert not lm.async_request(b, 100)
+    assert lm.next_deadline(a, 100) == 900
+    assert not lm.should_yield(a, 899)
+    assert lm.should_yield(a, 900)
+    assert not lm.should_yield(b, 900)
@@ -0,0 +1,43 @@
+"""Option changes: applied in place unless the entities or name change."""
+import pytest
+
+from custom_components.towel_warmer_plug.const import (
+    CONF_ECO_MODE, CONF_MALFUNCTION_WINDOW, CONF_MINIMUM_POWER, CONF_SWITCH, DOMAIN,
+)
+
+from conftest import async_setup_warmers, make_entry
+
+pytestmark = pytest.mark.usefixtures("enable_custom_integrations")
+
+async def test_thresholds_are_applied_without_reload(hass):
+    entry = make_entry()
+    await async_setup_warmers(hass, entry)
+    coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+    control = hass.states.get("switch.bathroom_control")
+
+    hass.config_entries.async_update_entry(entry, options={
+        CONF_MINIMUM_POWER: 50.0, CONF_MALFUNCTION_WINDOW: 120, CONF_ECO_MODE: True,
+    })
+    await hass.async_block_till_done()
+
+    assert hass.data[DOMAIN][entry.entry_id]["coordinator"] is coordinator
+    assert coordinator.config.minimum_power == 50.0
+    assert coordinator.power_stats.threshold == 50.0
+    assert coordinator.energy.threshold == 50.0
+    assert coordinator.duty.threshold == 50.0
+    assert coordinator.config.eco_mode
+    # As entidades não foram recriadas
+    assert hass.states.get("switch.bathroom_control").last_changed == control.last_changed
+
+async def test_other_switch_reloads_the_entry(hass):
+    entry = make_entry()
+    await async_setup_warmers(hass, entry)
+    coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+    hass.states.async_set("switch.other_plug", "on")
+
+    hass.config_entries.async_update_entry(entry, options={CONF_SWITCH: "switch.other_plug"})
+    await hass.async_block_till_done()
+
+    reloaded = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+    assert reloaded is not coordinator
+    assert reloaded.config.switch_entity == "switch.other_plug"
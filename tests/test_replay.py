@@ -0,0 +1,75 @@
+"""Offline replay of recorded history."""
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from homeassistant.util import dt as dt_util
+
+from custom_components.towel_warmer_plug.control import Action, ControlParams
+from custom_components.towel_warmer_plug.replay import filter_samples, load_history, merge_streams, replay, sweep_minimum_power
+from custom_components.towel_warmer_plug.schedule import TowelWarmerSchedule
+
+PARAMS = ControlParams(minimum_power=10, manual_max_duration=600, malfunction_delay=60)
+
+def test_load_history_csv(tmp_path):
+    path = tmp_path / "history.csv"
+    path.write_text(
+        "entity_id,state,last_changed\n"
+        "switch.plug,off,2026-01-05T06:00:00Z\n"
+        "sensor.power,0.4,2026-01-05T06:00:00+00:00\n"
+        "switch.plug,on,2026-01-05T06:30:00Z\n"
+    )
+    history = load_history(str(path))
+    assert [state for _, state in history["switch.plug"]] == ["off", "on"]
+    assert history["switch.plug"][1][0] - history["switch.plug"][0][0] == 1800
+    assert history["sensor.power"][0][1] == "0.4"
+
+def test_merge_keeps_power_through_unavailable():
+    switch = [(0, "off"), (100, "on")]
+    power = [(0, "0"), (50, "unavailable"), (110, "400")]
+    assert merge_streams(switch, power) == [(0, "off", 0.0), (100, "on", 0.0), (110, "on", 400.0)]
+
+def test_replay_reports_override_expiry():
+    samples = [(0, "off", 0.0), (100, "on", 400.0), (2000, "on", 400.0)]
+    report = replay(PARAMS, samples, auto_enabled=False)
+    assert report.manual_overrides == [100]
+    assert report.actions == [(701, Action.OVERRIDE_EXPIRED)]
+    assert report.malfunctions == []
+
+def test_sweep_counts_low_power_runs():
+    # 70 s entre 5 W e 10 W com o switch ligado
+    samples = [(0, "on", 400.0), (100, "on", 7.0), (170, "on", 400.0), (1000, "on", 400.0)]
+    assert sweep_minimum_power(samples, [5, 10], 60) == {
+        5: {"episodes": 0, "flagged_seconds": 0.0},
+        10: {"episodes": 1, "flagged_seconds": 10.0},
+    }
+
+def test_short_dips_are_filtered():
+    samples = [(0, "on", 400.0), (100, "on", 0.0), (102, "on", 400.0)]
+    assert {power for _, _, power in filter_samples(samples)} == {400.0}
+
+def test_replay_and_sweep_agree():
+    # Uma queda de 70 s e outra de 50 s
+    samples = [
+        (0, "on", 400.0), (100, "on", 1.0), (170, "on", 400.0),
+        (300, "on", 1.0), (350, "on", 400.0), (1000, "on", 400.0),
+    ]
+    report = replay(PARAMS, samples)
+    sweep = sweep_minimum_power(samples, [PARAMS.minimum_power], PARAMS.malfunction_delay)
+    assert len(report.malfunctions) == 1
+    assert sweep[PARAMS.minimum_power]["episodes"] == 1
+    assert sweep[PARAMS.minimum_power]["flagged_seconds"] == 10
+
+@pytest.fixture
+def new_york():
+    previous = dt_util.DEFAULT_TIME_ZONE
+    dt_util.set_default_time_zone(ZoneInfo("America/New_York"))
+    yield
+    dt_util.set_default_time_zone(previous)
+
+def test_schedule_in_local_time(new_york):
+    # 2026-01-05 06:30 em Nova Iorque é 11:30 UTC
+    start = 1767592800.0  # 2026-01-05T06:00:00Z
+    samples = [(start, "off", 0.0), (start + 8 * 3600, "off", 0.0)]
+    report = replay(PARAMS, samples, TowelWarmerSchedule.from_times("06:30", "08:00"))
+    assert report.actions == [(start + 5.5 * 3600, Action.SCHEDULE_ON)]
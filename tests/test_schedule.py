@@ -0,0 +1,59 @@
+"""Compiled schedules: membership, next transition and parsing."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from custom_components.towel_warmer_plug.schedule import TowelWarmerSchedule, parse_weekly_schedule
+
+# Segunda-feira
+MONDAY = datetime(2026, 1, 5, tzinfo=timezone.utc)
+TICK = timedelta(microseconds=1)
+
+def at(day: int, hour: int, minute: int = 0, second: int = 0) -> datetime:
+    return MONDAY + timedelta(days=day, hours=hour, minutes=minute, seconds=second)
+
+@pytest.fixture(autouse=True)
+def _utc(utc_default):
+    pass
+
+def test_daily_window():
+    schedule = TowelWarmerSchedule.from_times("06:30", "08:00")
+    assert not schedule.is_inside(at(0, 6, 29, 59))
+    assert schedule.is_inside(at(0, 6, 30))
+    assert schedule.is_inside(at(0, 8))
+    assert not schedule.is_inside(at(0, 8, 0, 1))
+
+def test_window_past_midnight():
+    schedule = TowelWarmerSchedule.from_times("22:00", "06:00")
+    assert schedule.is_inside(at(0, 23))
+    assert schedule.is_inside(at(1, 5))
+    assert not schedule.is_inside(at(1, 12))
+    # Transição no instante seguinte ao fim inclusivo
+    assert schedule.next_transition(at(0, 23)) == at(1, 6) + TICK
+    assert schedule.next_transition(at(1, 12)) == at(1, 22)
+
+def test_window_wraps_end_of_week():
+    schedule = TowelWarmerSchedule.from_spec("sun 22:00-06:00")
+    assert schedule.is_inside(at(6, 23))
+    assert schedule.is_inside(at(7, 5))
+    assert not schedule.is_inside(at(7, 7))
+    assert schedule.next_transition(at(6, 23)) == at(7, 6) + TICK
+
+def test_weekly_rules():
+    schedule = TowelWarmerSchedule.from_spec("mon-fri 06:30-08:00, 18:00-22:00; weekends 08:00-23:00")
+    assert schedule.is_inside(at(4, 19))
+    assert not schedule.is_inside(at(4, 12))
+    assert not schedule.is_inside(at(5, 7))
+    assert schedule.is_inside(at(5, 9))
+    assert schedule.next_transition(at(4, 23)) == at(5, 8)
+
+def test_all_day_has_no_transition():
+    schedule = TowelWarmerSchedule.from_times("00:00", "00:00")
+    assert schedule.always_on
+    assert schedule.is_inside(at(3, 12))
+    assert schedule.next_transition(at(3, 12)) is None
+
+@pytest.mark.parametrize("spec", ["mon-fri", "xyz 06:00-07:00", "mon 25:00-26:00", "mon 06:00"])
+def test_invalid_spec(spec):
+    with pytest.raises(ValueError):
+        parse_weekly_schedule(spec)
@@ -0,0 +1,70 @@
+"""Rolling power statistics and the time-weighted filter."""
+import pytest
+
+from custom_components.towel_warmer_plug.stats import PowerStats
+
+def make() -> PowerStats:
+    return PowerStats(window=60, threshold=10, filter_window=10)
+
+def test_single_sample_turn_on_wins_once_held():
+    stats = make()
+    # Duas leituras baixas antigas, e o aquecimento reportado uma única vez
+    stats.add(0, 0.0)
+    stats.add(30, 0.5)
+    stats.add(100, 400.0)
+    assert stats.filtered_at(100) == 0.5
+    assert stats.filtered_at(106) == 400.0
+    assert stats.settles_at() == 110
+
+def test_short_spike_is_rejected():
+    stats = make()
+    stats.add(0, 400.0)
+    stats.add(100, 0.0)
+    stats.add(102, 400.0)
+    assert stats.filtered_at(102) == 400.0
+    assert stats.filtered_at(105) == 400.0
+
+def test_repeated_spike_samples_are_rejected():
+    stats = make()
+    stats.add(0, 400.0)
+    for ts in (100, 100.5, 101, 101.5):
+        stats.add(ts, 0.0)
+    stats.add(102, 400.0)
+    assert stats.filtered_at(103) == 400.0
+
+def test_time_below_threshold():
+    stats = make()
+    stats.add(0, 400.0)
+    stats.add(10, 2.0)
+    stats.add(40, 400.0)
+    assert stats.time_below(50) == pytest.approx(30)
+    # Só 40 - 30 s da leitura baixa ficam dentro da janela de 60 s
+    assert stats.time_below(90) == pytest.approx(10)
+    stats.add(90, 1.0)
+    assert stats.time_below(100) == pytest.approx(10)
+
+def test_set_threshold_recomputes_below_time():
+    stats = make()
+    stats.add(0, 50.0)
+    stats.add(20, 400.0)
+    stats.add(40, 400.0)
+    assert stats.time_below(40) == 0
+    stats.set_threshold(100)
+    assert stats.time_below(40) == pytest.approx(20)
+
+def test_set_window_drops_old_samples():
+    stats = make()
+    for ts, value in ((0, 1.0), (30, 5.0), (50, 9.0)):
+        stats.add(ts, value)
+    assert stats.rolling_min() == 1.0
+    stats.set_window(15)
+    assert stats.count == 2
+    assert stats.rolling_min() == 5.0
+
+def test_capacity_is_bounded():
+    stats = PowerStats(window=10_000, threshold=10, capacity=8)
+    for ts in range(20):
+        stats.add(ts, float(ts))
+    assert stats.count == 8
+    assert stats.rolling_mean() == pytest.approx(sum(range(12, 20)) / 8)
+    assert stats.rolling_min() == 12.0
@@ -0,0 +1,57 @@
+"""Persistence: writes only on change, one shared file."""
+from datetime import timedelta
+
+import pytest
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.towel_warmer_plug.const import DOMAIN, DATA_STORE, STORAGE_SAVE_DELAY
+from custom_components.towel_warmer_plug.storage import TowelWarmerStore
+
+from conftest import async_setup_warmers, make_entry
+
+pytestmark = pytest.mark.usefixtures("enable_custom_integrations")
+
+async def test_unchanged_data_is_not_written_again(hass, hass_storage):
+    store = TowelWarmerStore(hass)
+    await store.async_load()
+    assert store.async_schedule_save("a", {"manual_override": False})
+    assert not store.async_schedule_save("a", {"manual_override": False})
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=STORAGE_SAVE_DELAY + 1))
+    await hass.async_block_till_done()
+    assert store.writes == 1
+    assert hass_storage[DOMAIN]["data"] == {"warmers": {"a": {"manual_override": False}}}
+
+    assert not store.async_schedule_save("a", {"manual_override": False})
+    assert store.async_schedule_save("a", {"manual_override": True})
+    await store.async_flush()
+    assert store.writes == 2
+
+async def test_idle_warmer_does_not_schedule_writes(hass):
+    entry = make_entry()
+    await async_setup_warmers(hass, entry)
+    coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+    writes = coordinator.metrics.counters["store_writes"]
+    for _ in range(3):
+        coordinator.save_persistent_data()
+        await coordinator.async_refresh()
+    assert coordinator.metrics.counters["store_writes"] == writes
+
+async def test_legacy_files_are_migrated_once(hass, hass_storage):
+    bathroom, kitchen = make_entry("Bathroom"), make_entry("Kitchen")
+    legacy = f"{DOMAIN}_bathroom"
+    hass_storage[legacy] = {"version": 1, "key": legacy, "data": {"typical_draw": 350}}
+    await async_setup_warmers(hass, bathroom, kitchen)
+
+    assert legacy not in hass_storage
+    warmers = hass_storage[DOMAIN]["data"]["warmers"]
+    assert warmers[bathroom.entry_id]["typical_draw"] == 350
+    assert kitchen.entry_id not in warmers
+    assert hass.data[DOMAIN][DATA_STORE].get(bathroom.entry_id)["typical_draw"] == 350
+
+async def test_all_warmers_share_one_file(hass, hass_storage):
+    entries = [make_entry(f"Warmer {index}") for index in range(3)]
+    await async_setup_warmers(hass, *entries)
+    await hass.data[DOMAIN][DATA_STORE].async_flush()
+    assert set(hass_storage[DOMAIN]["data"]["warmers"]) == {entry.entry_id for entry in entries}
+    assert not [key for key in hass_storage if key.startswith(f"{DOMAIN}_")]